@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from lru import LRUCache
+from redis_app import AsyncRedisService, RedisService
+from assistant.prompts import PROMPT_VERSION
+
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "10000"))
+
+ANALYSIS_CACHE_PREFIX = "analysis:"
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache of per-task analyses.
+
+    Keys are a hash of everything that goes into the prompt (title,
+    description, completed, model and prompt version), so an unchanged task
+    maps to the same entry no matter its id. Lookups hit the in-process LRU
+    first and fall back to Redis; Redis hits are promoted to the LRU.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = ANALYSIS_CACHE_TTL_SECONDS,
+        use_redis: bool = True
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self.local = LRUCache(max_entries, ttl_seconds, name="analysis")
+
+    @staticmethod
+    def make_key(task, model: str) -> str:
+        payload = json.dumps(
+            [PROMPT_VERSION, model, task.title, task.description, bool(task.completed)],
+            ensure_ascii=False
+        )
+        return ANALYSIS_CACHE_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached analysis text
+        :param key: Key from make_key
+        :return: Analysis text or None on a miss
+        """
+        analysis = self.local.get(key)
+        if analysis is not None or not self.use_redis:
+            return analysis
+
+        cached = RedisService.get_key(key)
+        if cached is not None:
+            analysis = cached["analysis"]
+            self.local.set(key, analysis)
+        return analysis
+
+    def set(self, key: str, analysis: str) -> None:
+        """
+        Store an analysis text in both tiers
+        """
+        self.local.set(key, analysis)
+        if self.use_redis:
+            RedisService.set_key(key, {"analysis": analysis}, expire_seconds=self.ttl_seconds)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """
+        Async get: LRU hits return inline, the Redis tier uses the asyncio client
+        """
+        analysis = self.local.get(key)
+        if analysis is not None or not self.use_redis:
+            return analysis
+        cached = await AsyncRedisService.get_key(key)
+        if cached is None:
+            return None
+        self.local.set(key, cached["analysis"])
+        return cached["analysis"]
+
+    async def aget_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up many keys: LRU first, then one MGET for the rest
+        :return: {key: analysis} for the hits
+        """
+        hits = {}
+        misses = []
+        for key in keys:
+            analysis = self.local.get(key)
+            if analysis is not None:
+                hits[key] = analysis
+            else:
+                misses.append(key)
+
+        if misses and self.use_redis:
+            for key, cached in zip(misses, await AsyncRedisService.get_many(misses)):
+                if cached is not None:
+                    hits[key] = cached["analysis"]
+                    self.local.set(key, cached["analysis"])
+        return hits
+
+    async def aset(self, key: str, analysis: str) -> None:
+        self.local.set(key, analysis)
+        if self.use_redis:
+            await AsyncRedisService.set_key(key, {"analysis": analysis}, expire_seconds=self.ttl_seconds)
+
+    async def aset_many(self, analyses: Dict[str, str]) -> None:
+        """
+        Store many analyses, one pipelined round-trip for Redis
+        """
+        for key, analysis in analyses.items():
+            self.local.set(key, analysis)
+        if self.use_redis:
+            await AsyncRedisService.set_many(
+                {key: {"analysis": analysis} for key, analysis in analyses.items()},
+                expire_seconds=self.ttl_seconds
+            )
+
+
+# Process-wide instance shared by every TaskAnalyzer
+analysis_cache = AnalysisCache()
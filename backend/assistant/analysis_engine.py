@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+import random
+from typing import AsyncIterator, Callable, Dict, List, Optional, TYPE_CHECKING
+
+from profiling import span
+from assistant.prompts import (
+    build_batch_messages,
+    build_task_messages,
+    pack_batches,
+    parse_batch_response
+)
+
+if TYPE_CHECKING:
+    from assistant.analysis_cache import AnalysisCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+# Engine configuration (overridable through the environment)
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "8"))
+ANALYSIS_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", "30"))
+ANALYSIS_MAX_RETRIES = int(os.getenv("ANALYSIS_MAX_RETRIES", "2"))
+ANALYSIS_BACKOFF_SECONDS = float(os.getenv("ANALYSIS_BACKOFF_SECONDS", "0.5"))
+# "per_task" sends one request per task, "batched" packs many tasks per request
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "per_task")
+ANALYSIS_BATCH_TOKEN_BUDGET = int(os.getenv("ANALYSIS_BATCH_TOKEN_BUDGET", "3500"))
+ANALYSIS_BATCH_MAX_TASKS = int(os.getenv("ANALYSIS_BATCH_MAX_TASKS", "15"))
+
+
+class AnalysisEngine:
+    """
+    Runs per-task LLM analyses concurrently with a bounded fan-out.
+    In "batched" mode several tasks share one request (up to a token
+    budget) and anything the batch response misses is retried per task.
+
+    The client must expose the openai.AsyncOpenAI surface
+    (`await client.chat.completions.create(model=..., messages=...)`).
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str = DEFAULT_MODEL,
+        concurrency: int = ANALYSIS_CONCURRENCY,
+        timeout: float = ANALYSIS_TIMEOUT_SECONDS,
+        max_retries: int = ANALYSIS_MAX_RETRIES,
+        backoff: float = ANALYSIS_BACKOFF_SECONDS,
+        cache: Optional["AnalysisCache"] = None,
+        mode: str = ANALYSIS_MODE,
+        batch_token_budget: int = ANALYSIS_BATCH_TOKEN_BUDGET,
+        batch_max_tasks: int = ANALYSIS_BATCH_MAX_TASKS
+    ):
+        self.client = client
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.cache = cache
+        self.mode = mode
+        self.batch_token_budget = batch_token_budget
+        self.batch_max_tasks = max(1, batch_max_tasks)
+
+    async def _complete(self, messages: list, **kwargs) -> str:
+        """
+        Run one chat completion with a per-call timeout and retries with
+        exponential backoff (plus jitter)
+        """
+        attempt = 0
+        while True:
+            try:
+                with span("llm"):
+                    response = await asyncio.wait_for(
+                        self.client.chat.completions.create(model=self.model, messages=messages, **kwargs),
+                        timeout=self.timeout
+                    )
+                return response.choices[0].message.content
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+                attempt += 1
+
+    def _cache_key(self, task) -> Optional[str]:
+        return self.cache.make_key(task, self.model) if self.cache else None
+
+    async def _get_cached(self, task, cache_key: Optional[str]) -> Optional[Dict]:
+        if not cache_key:
+            return None
+        cached = await self.cache.aget(cache_key)
+        if cached is None:
+            return None
+        return {
+            "task_id": task.id,
+            "analysis": cached,
+            "success": True,
+            "cached": True
+        }
+
+    async def analyze_task(self, task) -> Dict:
+        """
+        Analyze a single task, never raising. Unchanged tasks are served
+        from the cache without a model call.
+        """
+        cached = await self._get_cached(task, self._cache_key(task))
+        if cached is not None:
+            return cached
+        return await self._analyze_uncached(task)
+
+    async def _analyze_uncached(self, task) -> Dict:
+        try:
+            analysis = await self._complete(build_task_messages(task))
+            if self.cache:
+                await self.cache.aset(self._cache_key(task), analysis)
+            return {
+                "task_id": task.id,
+                "analysis": analysis,
+                "success": True
+            }
+        except Exception as e:
+            logger.warning("Error analyzing task %s: %r", task.id, e)
+            return {
+                "task_id": task.id,
+                "analysis": "Error occurred during analysis",
+                "success": False
+            }
+
+    async def analyze_tasks(
+        self,
+        tasks: List,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> List[Dict]:
+        """
+        Analyze many tasks concurrently, at most `concurrency` calls in flight.
+        Results keep the order of `tasks`; failed tasks are reported with
+        success=False instead of failing the whole batch.
+        :param on_progress: Optional callback(done, total) run after each task
+        :param on_result: Optional callback(result) run as each task finishes
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        total = len(tasks)
+        done = 0
+
+        def report(result: Dict) -> Dict:
+            nonlocal done
+            done += 1
+            if on_result:
+                on_result(result)
+            if on_progress:
+                on_progress(done, total)
+            return result
+
+        async def bounded(task):
+            async with semaphore:
+                result = await self._analyze_uncached(task)
+            return report(result)
+
+        # Serve cache hits first, with a single lookup for the whole list
+        results = {}
+        pending = []
+        hits = {}
+        if self.cache:
+            hits = await self.cache.aget_many([self._cache_key(task) for task in tasks])
+        for task in tasks:
+            analysis = hits.get(self._cache_key(task)) if hits else None
+            if analysis is not None:
+                results[task.id] = report({
+                    "task_id": task.id,
+                    "analysis": analysis,
+                    "success": True,
+                    "cached": True
+                })
+            else:
+                pending.append(task)
+
+        if self.mode != "batched":
+            for task, result in zip(pending, await asyncio.gather(*(bounded(task) for task in pending))):
+                results[task.id] = result
+            return [results[task.id] for task in tasks]
+
+        async def run_batch(batch: List):
+            async with semaphore:
+                analyses = await self._analyze_batch(batch)
+            for task in batch:
+                if task.id in analyses:
+                    results[task.id] = report({
+                        "task_id": task.id,
+                        "analysis": analyses[task.id],
+                        "success": True
+                    })
+            # Tasks the model skipped or mangled fall back to single calls
+            missing = [task for task in batch if task.id not in analyses]
+            for task, result in zip(missing, await asyncio.gather(*(bounded(task) for task in missing))):
+                results[task.id] = result
+
+        batches = pack_batches(pending, self.batch_token_budget, self.batch_max_tasks)
+        await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return [results[task.id] for task in tasks]
+
+    async def _analyze_batch(self, batch: List) -> Dict[int, str]:
+        """
+        Analyze several tasks with one request
+        :return: {task_id: analysis} for the tasks parsed from the response;
+                 empty if the call or the parsing failed
+        """
+        if len(batch) == 1:
+            return {}
+        try:
+            content = await self._complete(
+                build_batch_messages(batch),
+                response_format={"type": "json_object"}
+            )
+            analyses = parse_batch_response(content, [task.id for task in batch])
+        except Exception as e:
+            logger.warning("Error analyzing task batch of %d: %r", len(batch), e)
+            return {}
+
+        if self.cache and analyses:
+            await self.cache.aset_many({
+                self._cache_key(task): analyses[task.id] for task in batch if task.id in analyses
+            })
+        return analyses
+
+    async def iter_analyses(self, tasks: List) -> AsyncIterator[Dict]:
+        """
+        Yield per-task results in completion order, as soon as each is ready
+        """
+        queue = asyncio.Queue()
+        runner = asyncio.create_task(self.analyze_tasks(tasks, on_result=queue.put_nowait))
+        try:
+            for _ in range(len(tasks)):
+                yield await queue.get()
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
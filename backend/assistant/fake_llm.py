@@ -0,0 +1,84 @@
+import asyncio
+import json
+import random
+import re
+from types import SimpleNamespace
+from typing import Optional
+
+from assistant.prompts import BATCH_SYSTEM_PROMPT, NOTE_BATCH_SYSTEM_PROMPT, estimate_tokens
+
+FAKE_ANALYSIS = """1. Priority Level: Medium
+2. Estimated time to complete: 1 hour
+3. Suggested deadline: Within 3 days
+4. Dependencies: None identified
+5. Tips: Break the task into small steps and start with the first one."""
+
+FAKE_NOTE_CATEGORY = {"category": "normal", "explanation": "Nothing in the note suggests a deadline."}
+
+
+class FakeLLMClient:
+    """
+    Local stand-in for openai.AsyncOpenAI used for offline benchmarks.
+    Only the `client.chat.completions.create(...)` and `close()` surface
+    is implemented.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        :param latency: Base latency of every call in seconds
+        :param jitter: Extra random latency in seconds (uniform 0..jitter)
+        :param failure_rate: Probability (0..1) that a call raises an error
+        :param seed: Optional seed for reproducible jitter/failures
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def respond(self, messages: list) -> str:
+        """
+        Build the fake completion text for the given messages
+        """
+        if messages[0]["content"] == BATCH_SYSTEM_PROMPT:
+            task_ids = re.findall(r'"task_id": (\d+)', messages[-1]["content"])
+            return json.dumps({task_id: FAKE_ANALYSIS for task_id in task_ids})
+        if messages[0]["content"] == NOTE_BATCH_SYSTEM_PROMPT:
+            note_ids = re.findall(r'"note_id": (\d+)', messages[-1]["content"])
+            return json.dumps({note_id: FAKE_NOTE_CATEGORY for note_id in note_ids})
+        return FAKE_ANALYSIS
+
+    async def close(self) -> None:
+        pass
+
+    async def _create(self, model: str, messages: list, **kwargs):
+        self.calls += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        await asyncio.sleep(delay)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise RuntimeError("Fake LLM failure")
+
+        content = self.respond(messages)
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        completion_tokens = estimate_tokens(content)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from models import NoteCategory
+from redis_app import AsyncRedisService
+from assistant.analysis_engine import AnalysisEngine, DEFAULT_MODEL
+from assistant.prompts import NOTE_PROMPT_VERSION, build_note_batch_messages, parse_note_batch_response
+from assistant.task_analyzer import create_async_client
+
+logger = logging.getLogger(__name__)
+
+# Notes sent in one model call
+NOTE_BATCH_SIZE = int(os.getenv("NOTE_BATCH_SIZE", "20"))
+# Results are kept per content hash so identical notes are categorized once
+NOTE_CATEGORY_TTL_SECONDS = int(os.getenv("NOTE_CATEGORY_TTL_SECONDS", str(30 * 24 * 3600)))
+
+NOTE_CATEGORY_PREFIX = "note_category:"
+NOTE_CATEGORIES = [category.value for category in NoteCategory]
+
+
+def note_content_hash(note, model: str = DEFAULT_MODEL) -> str:
+    """
+    Key of a note's categorization: title and content, plus model and
+    prompt version (a new prompt or model categorizes again)
+    """
+    payload = json.dumps([NOTE_PROMPT_VERSION, model, note.title, note.content], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NoteCategorizer:
+    """
+    Categorizes notes with one model call per batch of up to `batch_size`
+    distinct contents.
+
+    Results are stored in Redis under a hash of the note's title and
+    content (plus model and prompt version), so a content that was already
+    categorized, or appears twice in one run, never costs another call.
+    Notes the model skips or answers with an unknown category are left out
+    of the result and can be retried later (see NoteQueue.record_failures).
+    """
+
+    def __init__(self, async_client=None, model: str = DEFAULT_MODEL, batch_size: int = NOTE_BATCH_SIZE):
+        self.engine = AnalysisEngine(async_client or create_async_client(), model=model)
+        self.model = model
+        self.batch_size = max(1, batch_size)
+
+    def content_hash(self, note) -> str:
+        return note_content_hash(note, self.model)
+
+    async def categorize(self, notes: List) -> Dict[int, Tuple[NoteCategory, str]]:
+        """
+        :param notes: Objects with id, title and content
+        :return: {note_id: (category, explanation)} for the categorized notes
+        """
+        hashes = {note.id: self.content_hash(note) for note in notes}
+        unique = {}
+        for note in notes:
+            unique.setdefault(hashes[note.id], note)
+
+        keys = [NOTE_CATEGORY_PREFIX + content_hash for content_hash in unique]
+        results = {
+            content_hash: tuple(cached)
+            for content_hash, cached in zip(unique, await AsyncRedisService.get_many(keys))
+            if cached is not None
+        }
+
+        pending = [note for content_hash, note in unique.items() if content_hash not in results]
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        semaphore = asyncio.Semaphore(self.engine.concurrency)
+
+        async def run_batch(batch: List) -> Dict[str, tuple]:
+            async with semaphore:
+                categorized = await self._categorize_batch(batch)
+            return {self.content_hash(note): categorized[note.id] for note in batch if note.id in categorized}
+
+        fresh = {}
+        for categorized in await asyncio.gather(*(run_batch(batch) for batch in batches)):
+            fresh.update(categorized)
+        if fresh:
+            await AsyncRedisService.set_many(
+                {NOTE_CATEGORY_PREFIX + content_hash: list(result) for content_hash, result in fresh.items()},
+                expire_seconds=NOTE_CATEGORY_TTL_SECONDS
+            )
+        results.update(fresh)
+
+        return {
+            note.id: (NoteCategory(results[hashes[note.id]][0]), results[hashes[note.id]][1])
+            for note in notes
+            if hashes[note.id] in results
+        }
+
+    async def aclose(self) -> None:
+        """
+        Close the model client's connections; they belong to the event
+        loop the categorizer was used on
+        """
+        await self.engine.client.close()
+
+    async def _categorize_batch(self, batch: List) -> Dict[int, tuple]:
+        """
+        One model call for the whole batch
+        :return: {note_id: (category value, explanation)}; empty on failure
+        """
+        try:
+            content = await self.engine._complete(
+                build_note_batch_messages(batch),
+                response_format={"type": "json_object"}
+            )
+            return parse_note_batch_response(content, [note.id for note in batch], NOTE_CATEGORIES)
+        except Exception as e:
+            logger.warning("Error categorizing a batch of %d notes: %r", len(batch), e)
+            return {}
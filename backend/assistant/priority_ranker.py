@@ -0,0 +1,247 @@
+import heapq
+import math
+import re
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Weight of each feature in the score; every feature is scaled to 0..1
+DEFAULT_WEIGHTS = {
+    "age": 0.35,
+    "keywords": 0.35,
+    "description": 0.1,
+    "llm_priority": 0.2
+}
+
+# Urgency of words in the title or description; a task scores its
+# strongest keyword
+DEFAULT_KEYWORDS = {
+    "urgent": 1.0,
+    "asap": 1.0,
+    "critical": 1.0,
+    "blocker": 1.0,
+    "overdue": 1.0,
+    "emergency": 1.0,
+    "today": 0.8,
+    "deadline": 0.8,
+    "important": 0.7,
+    "tomorrow": 0.6,
+    "bug": 0.6,
+    "fix": 0.6,
+    "invoice": 0.5,
+    "release": 0.5,
+    "deploy": 0.5,
+    "meeting": 0.4,
+    "review": 0.3,
+    "someday": -0.5,
+    "maybe": -0.3
+}
+
+# Days after which a pending task gets the full age score (log-scaled below)
+AGE_SATURATION_DAYS = 30
+# Description length (characters) that gets the full description score
+DESCRIPTION_SATURATION = 500
+# "Priority Level: High" in cached analyses (see prompts.SYSTEM_PROMPT)
+LLM_PRIORITY_LEVELS = {"critical": 1.0, "urgent": 1.0, "high": 1.0, "medium": 0.5, "low": 0.0}
+LLM_PRIORITY_PATTERN = re.compile(r"priority(?: level)?\W+(critical|urgent|high|medium|low)", re.IGNORECASE)
+# Score used when no LLM priority is known
+NEUTRAL_LLM_PRIORITY = 0.5
+# Candidates (by local score) for which LLM priorities are looked up
+LLM_CANDIDATES_FACTOR = 4
+
+
+def parse_llm_priority(analysis: Optional[str]) -> Optional[float]:
+    """
+    Priority level of an analysis text as 0..1, None if it has none
+    """
+    if not analysis:
+        return None
+    match = LLM_PRIORITY_PATTERN.search(analysis)
+    return LLM_PRIORITY_LEVELS[match.group(1).lower()] if match else None
+
+
+class PriorityRanker:
+    """
+    Local scoring of pending tasks: no network calls, so it can run on
+    every workload request.
+
+    Features (each 0..1) are combined with `weights`:
+        age           days pending, log-scaled up to AGE_SATURATION_DAYS
+        keywords      strongest urgency keyword in title/description
+        description   description length up to DESCRIPTION_SATURATION
+        llm_priority  "Priority Level" of a cached LLM analysis, if any
+
+    Keyword matching is a regex search per task, so ranking costs a few
+    microseconds per task: callers pass a bounded set of candidates
+    (crud.get_priority_candidates), not a whole backlog. Scores are
+    combined with NumPy when installed and top-k is selected with
+    argpartition; without NumPy both run in Python (heapq). LLM priorities
+    are only looked up for the best LLM_CANDIDATES_FACTOR * k tasks by
+    local score.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        keywords: Optional[Dict[str, float]] = None,
+        age_saturation_days: float = AGE_SATURATION_DAYS,
+        description_saturation: int = DESCRIPTION_SATURATION
+    ):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.keywords = keywords if keywords is not None else DEFAULT_KEYWORDS
+        self.age_saturation_days = age_saturation_days
+        self.description_saturation = description_saturation
+        # One pattern per distinct weight, strongest first: the first tier
+        # that matches gives the task's keyword, so most texts are scanned
+        # by a few C-level searches instead of a Python loop over matches
+        tiers = {}
+        for word, weight in self.keywords.items():
+            tiers.setdefault(weight, []).append(word)
+        self._keyword_tiers = [
+            (weight, re.compile(
+                r"\b(" + "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True)) + r")\b",
+                re.IGNORECASE
+            ))
+            for weight, words in sorted(tiers.items(), key=lambda tier: -abs(tier[0]))
+        ]
+        # Words that raise the score, strongest first
+        self.urgency_tiers = [
+            (weight, words) for weight, words in sorted(tiers.items(), key=lambda tier: -tier[0]) if weight > 0
+        ]
+
+    def _match_keyword(self, text: str) -> tuple:
+        """
+        :return: (score, strongest keyword or None); negative weights
+                 ("someday") push below tasks without keywords
+        """
+        for weight, pattern in self._keyword_tiers:
+            match = pattern.search(text)
+            if match:
+                return weight, match.group(1).lower()
+        return 0.0, None
+
+    def _keyword_score(self, task) -> tuple:
+        """
+        :return: (score -1..1, strongest keyword or None)
+        """
+        return self._match_keyword(f"{task.title or ''} {task.description or ''}")
+
+    def _features(self, tasks: Sequence, now: datetime) -> dict:
+        match = self._match_keyword
+        keyword_scores, ages, lengths = [], [], []
+        for task in tasks:
+            description = task.description or ""
+            keyword_scores.append(match(f"{task.title or ''} {description}")[0])
+            ages.append((now - task.created_at).total_seconds() if task.created_at else 0.0)
+            lengths.append(len(description))
+        return {"keywords": keyword_scores, "ages": ages, "lengths": lengths}
+
+    def score(self, tasks: Sequence, llm_priorities: Optional[Dict[int, float]] = None, now: Optional[datetime] = None):
+        """
+        Scores of `tasks` (objects with id, title, description, created_at)
+        :param llm_priorities: {task_id: 0..1} known LLM priorities
+        :return: NumPy array (or list without NumPy) aligned with `tasks`
+        """
+        now = now or datetime.utcnow()
+        features = self._features(tasks, now)
+        llm = [
+            (llm_priorities or {}).get(task.id, NEUTRAL_LLM_PRIORITY) for task in tasks
+        ] if llm_priorities else None
+        weights = self.weights
+        saturation = math.log1p(self.age_saturation_days)
+
+        if np is not None:
+            ages = np.clip(np.asarray(features["ages"], dtype=np.float64) / 86400, 0, None)
+            scores = weights["age"] * np.minimum(np.log1p(ages) / saturation, 1.0)
+            scores += weights["keywords"] * np.asarray(features["keywords"], dtype=np.float64)
+            scores += weights["description"] * np.minimum(
+                np.asarray(features["lengths"], dtype=np.float64) / self.description_saturation, 1.0
+            )
+            scores += weights["llm_priority"] * (
+                np.asarray(llm, dtype=np.float64) if llm is not None else NEUTRAL_LLM_PRIORITY
+            )
+            return scores
+
+        return [
+            weights["age"] * min(math.log1p(max(age / 86400, 0.0)) / saturation, 1.0)
+            + weights["keywords"] * keyword
+            + weights["description"] * min(length / self.description_saturation, 1.0)
+            + weights["llm_priority"] * (llm[i] if llm is not None else NEUTRAL_LLM_PRIORITY)
+            for i, (age, keyword, length) in enumerate(zip(features["ages"], features["keywords"], features["lengths"]))
+        ]
+
+    @staticmethod
+    def top_k(scores, k: int) -> List[int]:
+        """
+        Indices of the k highest scores, best first
+        """
+        n = len(scores)
+        if k <= 0 or n == 0:
+            return []
+        if np is not None:
+            if k >= n:
+                return [int(i) for i in np.argsort(-scores, kind="stable")]
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            return [int(i) for i in candidates[np.argsort(-scores[candidates], kind="stable")]]
+        return heapq.nlargest(k, range(n), key=scores.__getitem__)
+
+    def rank(
+        self,
+        tasks: Sequence,
+        k: int = 5,
+        llm_priorities: Optional[Dict[int, float]] = None,
+        llm_priority_lookup: Optional[Callable[[Sequence], Dict[int, float]]] = None,
+        now: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Top-k pending tasks with their score and a reason
+        :param llm_priorities: Known {task_id: 0..1} LLM priorities
+        :param llm_priority_lookup: Called with the best candidates by
+                                    local score to fetch their LLM
+                                    priorities (e.g. from the analysis cache)
+        :return: [{"id", "title", "score", "reason"}], best first
+        """
+        now = now or datetime.utcnow()
+        tasks = list(tasks)
+        scores = self.score(tasks, llm_priorities, now)
+
+        if llm_priority_lookup is not None and tasks:
+            candidates = [tasks[i] for i in self.top_k(scores, k * LLM_CANDIDATES_FACTOR)]
+            found = llm_priority_lookup(candidates)
+            if found:
+                tasks = candidates
+                llm_priorities = {**(llm_priorities or {}), **found}
+                scores = self.score(tasks, llm_priorities, now)
+
+        return [
+            {
+                "id": tasks[i].id,
+                "title": tasks[i].title,
+                "score": round(float(scores[i]), 4),
+                "reason": self.reason(tasks[i], (llm_priorities or {}).get(tasks[i].id), now)
+            }
+            for i in self.top_k(scores, k)
+        ]
+
+    def reason(self, task, llm_priority: Optional[float], now: datetime) -> str:
+        reasons = []
+        _, keyword = self._keyword_score(task)
+        if keyword is not None and self.keywords[keyword] > 0:
+            reasons.append(f"mentions '{keyword}'")
+        if task.created_at:
+            days = int((now - task.created_at).total_seconds() // 86400)
+            if days >= 1:
+                reasons.append(f"pending for {days} day{'s' if days != 1 else ''}")
+        if llm_priority is not None and llm_priority >= LLM_PRIORITY_LEVELS["high"]:
+            reasons.append("rated high priority by the assistant")
+        if not reasons:
+            return "Pending task requiring attention"
+        return "Pending task: " + ", ".join(reasons)
+
+
+# Shared so the keyword patterns are compiled once
+priority_ranker = PriorityRanker()
@@ -0,0 +1,205 @@
+import json
+from typing import Dict, List
+
+# Bump when the prompt text changes so cached analyses are not reused
+PROMPT_VERSION = 1
+# Same for cached note categories
+NOTE_PROMPT_VERSION = 1
+
+SYSTEM_PROMPT = "You are an AI assistant that analyzes tasks and provides practical recommendations."
+
+
+def build_task_prompt(task) -> str:
+    """
+    Build the analysis prompt for a single task
+    """
+    return f"""
+        Analyze this task and provide recommendations:
+        Title: {task.title}
+        Description: {task.description}
+        Status: {"Completed" if task.completed else "Not Completed"}
+
+        Provide:
+        1. Priority Level (High/Medium/Low)
+        2. Estimated time to complete
+        3. Suggested deadline
+        4. Any potential dependencies or prerequisites
+        5. Tips for efficient completion
+        """
+
+
+def build_task_messages(task) -> list:
+    """
+    Build the chat messages for a single task analysis
+    """
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_task_prompt(task)}
+    ]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (about 4 characters per token for English text)
+    """
+    return max(1, len(text) // 4)
+
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an AI assistant that analyzes tasks and provides practical recommendations. "
+    "You always answer with a single JSON object and nothing else."
+)
+
+BATCH_INSTRUCTIONS = """
+        Analyze each task below and provide recommendations. For every task provide:
+        1. Priority Level (High/Medium/Low)
+        2. Estimated time to complete
+        3. Suggested deadline
+        4. Any potential dependencies or prerequisites
+        5. Tips for efficient completion
+
+        Answer with one JSON object whose keys are the task_id values (as strings)
+        and whose values are the analysis text for that task, e.g.
+        {"12": "1. Priority Level: High\\n2. ...", "15": "..."}
+        Include every task_id exactly once.
+
+        Tasks:
+        """
+
+# Expected completion size per task, reserved from the batch token budget
+BATCH_OUTPUT_TOKENS_PER_TASK = 200
+
+
+def _batch_task_line(task) -> str:
+    return json.dumps({
+        "task_id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "status": "Completed" if task.completed else "Not Completed"
+    }, ensure_ascii=False)
+
+
+def build_batch_messages(tasks: list) -> list:
+    """
+    Build the chat messages analyzing several tasks in one request
+    """
+    lines = "\n".join(_batch_task_line(task) for task in tasks)
+    return [
+        {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": BATCH_INSTRUCTIONS + lines}
+    ]
+
+
+def pack_batches(tasks: list, token_budget: int, max_tasks: int) -> List[list]:
+    """
+    Greedily pack tasks into batches whose estimated prompt plus expected
+    completion stays within `token_budget` tokens (a single task that is
+    larger than the budget still gets a batch of its own)
+    """
+    overhead = estimate_tokens(BATCH_SYSTEM_PROMPT) + estimate_tokens(BATCH_INSTRUCTIONS)
+    batches, current, used = [], [], overhead
+    for task in tasks:
+        cost = estimate_tokens(_batch_task_line(task)) + BATCH_OUTPUT_TOKENS_PER_TASK
+        if current and (used + cost > token_budget or len(current) >= max_tasks):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(task)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _load_json_object(content: str) -> dict:
+    """
+    Parse model output that should be a JSON object (optionally fenced)
+    :raises ValueError: If it is not a JSON object
+    """
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):]
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("Batch response is not a JSON object")
+    return data
+
+
+def parse_batch_response(content: str, task_ids: list) -> Dict[int, str]:
+    """
+    Parse a batch completion into {task_id: analysis}
+    :param content: Model output, a JSON object keyed by task_id
+    :param task_ids: Ids that were sent; unknown keys are ignored
+    :return: Analyses for the ids that could be parsed (may be partial)
+    :raises ValueError: If the output is not a JSON object
+    """
+    data = _load_json_object(content)
+    wanted = set(task_ids)
+    analyses = {}
+    for key, value in data.items():
+        try:
+            task_id = int(key)
+        except (TypeError, ValueError):
+            continue
+        if task_id not in wanted or not value:
+            continue
+        if isinstance(value, dict):
+            value = "\n".join(f"{k}: {v}" for k, v in value.items())
+        analyses[task_id] = str(value)
+    return analyses
+
+
+NOTE_BATCH_SYSTEM_PROMPT = (
+    "You are an AI assistant that sorts notes by how soon they need attention. "
+    "You always answer with a single JSON object and nothing else."
+)
+
+NOTE_BATCH_INSTRUCTIONS = """
+        Categorize each note below as one of: urgent, important, normal, low_priority,
+        and explain the choice in one sentence.
+
+        Answer with one JSON object whose keys are the note_id values (as strings)
+        and whose values are objects with "category" and "explanation", e.g.
+        {"12": {"category": "urgent", "explanation": "The invoice is due today."}}
+        Include every note_id exactly once.
+
+        Notes:
+        """
+
+
+def build_note_batch_messages(notes: list) -> list:
+    """
+    Build the chat messages categorizing several notes in one request
+    """
+    lines = "\n".join(
+        json.dumps({"note_id": note.id, "title": note.title, "content": note.content}, ensure_ascii=False)
+        for note in notes
+    )
+    return [
+        {"role": "system", "content": NOTE_BATCH_SYSTEM_PROMPT},
+        {"role": "user", "content": NOTE_BATCH_INSTRUCTIONS + lines}
+    ]
+
+
+def parse_note_batch_response(content: str, note_ids: list, categories: List[str]) -> Dict[int, tuple]:
+    """
+    Parse a note batch completion into {note_id: (category, explanation)}
+    :param note_ids: Ids that were sent; unknown keys are ignored
+    :param categories: Accepted category values; other values are dropped
+    :return: Results for the ids that could be parsed (may be partial)
+    :raises ValueError: If the output is not a JSON object
+    """
+    data = _load_json_object(content)
+    wanted = set(note_ids)
+    results = {}
+    for key, value in data.items():
+        try:
+            note_id = int(key)
+        except (TypeError, ValueError):
+            continue
+        if note_id not in wanted or not isinstance(value, dict):
+            continue
+        category = str(value.get("category", "")).strip().lower().replace(" ", "_")
+        if category in categories:
+            results[note_id] = (category, str(value.get("explanation") or ""))
+    return results
@@ -1,39 +1,91 @@
-from typing import List, Dict
+from typing import AsyncIterator, Callable, List, Dict, Optional, Sequence
+import asyncio
+import logging
+import weakref
 import openai 
 from models import Task
 import os
 from dotenv import load_dotenv
+from assistant.analysis_cache import ANALYSIS_CACHE_ENABLED, analysis_cache
+from assistant.analysis_engine import AnalysisEngine, DEFAULT_MODEL
+from assistant.fake_llm import FakeLLMClient
+from assistant.priority_ranker import parse_llm_priority, priority_ranker
+from assistant.prompts import SYSTEM_PROMPT, build_task_prompt
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# "openai" (default) or "fake" to run analyses against the local stub
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "50"))
+
+def create_async_client(api_key: Optional[str] = None):
+    """
+    Async LLM client for LLM_BACKEND (openai.AsyncOpenAI or the local stub)
+    """
+    if LLM_BACKEND == "fake":
+        return FakeLLMClient(latency=FAKE_LLM_LATENCY_MS / 1000)
+    return openai.AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+
+# One client per event loop: its connection pool belongs to the loop
+_shared_clients = weakref.WeakKeyDictionary()
+
+def get_shared_async_client():
+    """
+    The running loop's LLM client, shared by requests so connections are
+    kept alive and reused rather than opened (TLS handshake included) for
+    every analysis
+    """
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None:
+        client = _shared_clients[loop] = create_async_client()
+    return client
+
+async def close_shared_async_client() -> None:
+    """
+    Close the running loop's shared client (app shutdown)
+    """
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
 class TaskAnalyzer:
-    def __init__(self):
+    def __init__(self, async_client=None, model: str = DEFAULT_MODEL, cache=None):
         self.api_key = os.getenv("OPENAI_API_KEY")
         openai.api_key = self.api_key
+        self.model = model
+        self._async_client = async_client
+        if cache is None and ANALYSIS_CACHE_ENABLED:
+            cache = analysis_cache
+        self.cache = cache
+        self.ranker = priority_ranker
 
-    def analyze_task(self, task: Task) -> Dict:
+    @property
+    def async_client(self):
         """
-        Analyze a single task and provide insights
+        Lazily create the async LLM client; the caller owns it and must
+        close it (prefer passing a shared one, see get_shared_async_client)
         """
-        prompt = f"""
-        Analyze this task and provide recommendations:
-        Title: {task.title}
-        Description: {task.description}
-        Status: {"Completed" if task.completed else "Not Completed"}
+        if self._async_client is None:
+            self._async_client = create_async_client(self.api_key)
+        return self._async_client
 
-        Provide:
-        1. Priority Level (High/Medium/Low)
-        2. Estimated time to complete
-        3. Suggested deadline
-        4. Any potential dependencies or prerequisites
-        5. Tips for efficient completion
+    def _engine(self) -> AnalysisEngine:
+        return AnalysisEngine(self.async_client, model=self.model, cache=self.cache)
+
+    def analyze_task(self, task: Task) -> Dict:
         """
+        Analyze a single task and provide insights
+        """
+        prompt = build_task_prompt(task)
 
         try:
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": "You are an AI assistant that analyzes tasks and provides practical recommendations."},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ]
             )
@@ -46,19 +98,32 @@ class TaskAnalyzer:
             }
 
         except Exception as e:
-            print(f"Error analyzing task: {e}")
+            logger.warning("Error analyzing task: %r", e)
             return {
                 "task_id": task.id,
                 "analysis": "Error occurred during analysis",
                 "success": False
             }
 
+    async def aanalyze_task(self, task: Task) -> Dict:
+        """
+        Analyze a single task with the async client (doesn't block the event loop)
+        """
+        return await self._engine().analyze_task(task)
+
     def get_task_distribution(self, tasks: List[Task]) -> Dict:
         """
         Get distribution of tasks by completion status and analyze workload
         """
         total_tasks = len(tasks)
         completed_tasks = len([task for task in tasks if task.completed])
+        return self.distribution_from_counts(total_tasks, completed_tasks)
+
+    @staticmethod
+    def distribution_from_counts(total_tasks: int, completed_tasks: int) -> Dict:
+        """
+        get_task_distribution from precomputed counters (see TaskStats)
+        """
         pending_tasks = total_tasks - completed_tasks
 
         return {
@@ -68,17 +133,26 @@ class TaskAnalyzer:
             "completion_rate": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         }
 
-    def get_workload_analysis(self, tasks: List[Task]) -> Dict:
+    def get_workload_analysis(self, tasks: List[Task], llm_priorities: Optional[Dict[int, float]] = None) -> Dict:
         """
         Analyze workload and provide recommendations for task management
+        :param llm_priorities: Known {task_id: 0..1} LLM priorities for ranking
         """
         distribution = self.get_task_distribution(tasks)
         pending_tasks = [task for task in tasks if not task.completed]
+        priority_tasks = self.identify_priority_tasks(pending_tasks, llm_priorities=llm_priorities)
+        return self.workload_from_distribution(distribution, priority_tasks)
 
+    def workload_from_distribution(self, distribution: Dict, priority_tasks: List[Dict]) -> Dict:
+        """
+        get_workload_analysis from a distribution and already ranked
+        priority tasks, so callers with precomputed counters don't need to
+        load every task
+        """
         recommendations = {
             "workload_status": self._get_workload_status(distribution),
-            "priority_tasks": self._identify_priority_tasks(pending_tasks),
-            "optimization_tips": self._generate_optimization_tips(distribution, pending_tasks)
+            "priority_tasks": priority_tasks,
+            "optimization_tips": self._generate_optimization_tips(distribution)
         }
 
         return recommendations
@@ -99,22 +173,37 @@ class TaskAnalyzer:
         else:
             return "Moderate workload. Focus on completing high-priority tasks first."
 
-    def _identify_priority_tasks(self, tasks: List[Task], limit: int = 5) -> List[Dict]:
+    def identify_priority_tasks(
+        self,
+        tasks: Sequence,
+        limit: int = 5,
+        llm_priorities: Optional[Dict[int, float]] = None
+    ) -> List[Dict]:
         """
-        Identify top priority tasks that need attention
+        Identify top priority tasks that need attention with the local
+        PriorityRanker (tasks need id, title, description, completed and
+        created_at). Priorities from cached analyses are used when present.
         """
-        # In a real implementation, you might want to use more sophisticated
-        # priority calculation based on due dates, dependencies, etc.
-        return [
-            {
-                "id": task.id,
-                "title": task.title,
-                "reason": "Pending task requiring attention"
-            }
-            for task in tasks[:limit]
-        ]
+        return self.ranker.rank(
+            tasks,
+            k=limit,
+            llm_priorities=llm_priorities,
+            llm_priority_lookup=self._cached_llm_priorities if self.cache is not None else None
+        )
 
-    def _generate_optimization_tips(self, distribution: Dict, pending_tasks: List[Task]) -> List[str]:
+    def _cached_llm_priorities(self, tasks: Sequence) -> Dict[int, float]:
+        """
+        LLM priorities of tasks whose analysis is in the in-process cache
+        tier (no Redis or LLM round-trip)
+        """
+        priorities = {}
+        for task in tasks:
+            priority = parse_llm_priority(self.cache.local.get(self.cache.make_key(task, self.model)))
+            if priority is not None:
+                priorities[task.id] = priority
+        return priorities
+
+    def _generate_optimization_tips(self, distribution: Dict) -> List[str]:
         """
         Generate specific tips for optimizing task completion
         """
@@ -126,7 +215,7 @@ class TaskAnalyzer:
         if distribution["completion_rate"] < 50:
             tips.append("Try using time-blocking techniques to focus on one task at a time.")
             
-        if len(pending_tasks) > 10:
+        if distribution["pending_tasks"] > 10:
             tips.append("Review and reprioritize tasks to ensure you're focusing on the most important ones.")
             
         if distribution["completed_tasks"] == 0:
@@ -140,13 +229,52 @@ class TaskAnalyzer:
         """
         Provide comprehensive analysis for a batch of tasks
         """
-        individual_analyses = []
-        for task in tasks:
-            analysis = self.analyze_task(task)
-            if analysis["success"]:
-                individual_analyses.append(analysis)
+        analyses = [self.analyze_task(task) for task in tasks]
+        return self._build_batch_report(tasks, analyses)
+
+    async def abatch_analyze_tasks(
+        self,
+        tasks: List[Task],
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Async variant of batch_analyze_tasks: per-task analyses run
+        concurrently through the AnalysisEngine. Failed analyses are left
+        out of individual_analyses and listed in failed_task_ids.
+        """
+        analyses = await self._engine().analyze_tasks(tasks, on_progress=on_progress)
+        report = self._build_batch_report(tasks, analyses)
+        report["failed_task_ids"] = [a["task_id"] for a in analyses if not a["success"]]
+        return report
+
+    async def astream_batch_analysis(self, tasks: List[Task]) -> AsyncIterator[Dict]:
+        """
+        Stream the batch analysis: one {"type": "analysis", ...} event per
+        task as soon as it finishes, then a final {"type": "summary", ...}
+        event with the same fields as batch_analyze_tasks
+        """
+        analyses = []
+        async for analysis in self._engine().iter_analyses(tasks):
+            analyses.append(analysis)
+            yield {"type": "analysis", **analysis}
+
+        report = self._build_batch_report(tasks, analyses)
+        report["failed_task_ids"] = [a["task_id"] for a in analyses if not a["success"]]
+        del report["individual_analyses"]
+        yield {"type": "summary", **report}
+
+    def _build_batch_report(self, tasks: List[Task], analyses: List[Dict]) -> Dict:
+        """
+        Combine per-task analyses with the workload summary
+        """
+        individual_analyses = [analysis for analysis in analyses if analysis["success"]]
+        llm_priorities = {
+            analysis["task_id"]: priority
+            for analysis in individual_analyses
+            if (priority := parse_llm_priority(analysis["analysis"])) is not None
+        }
 
-        workload_analysis = self.get_workload_analysis(tasks)
+        workload_analysis = self.get_workload_analysis(tasks, llm_priorities=llm_priorities)
         distribution = self.get_task_distribution(tasks)
 
         return {
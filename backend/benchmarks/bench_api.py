@@ -0,0 +1,305 @@
+"""
+End-to-end API benchmark against local stand-ins: the FastAPI app runs
+in-process (httpx ASGI transport), on SQLite or a throwaway Postgres
+database, fakeredis and the fake LLM client.
+
+    pip install httpx "fakeredis[lua]"
+    python -m benchmarks.bench_api --sizes 10,1000,100000 --output baseline.json
+    python -m benchmarks.bench_api --sizes 10,1000,100000 --baseline baseline.json
+
+For every user size (number of tasks) it measures:
+    tasks_cold     GET /api/tasks right after the cache was invalidated
+    tasks_warm     GET /api/tasks served from the cache
+    tasks_304      GET /api/tasks with a matching If-None-Match
+    tasks_page     GET /api/tasks?limit=50
+    create         POST /api/tasks
+    delete         DELETE /api/tasks/{id}
+    analyze_cold   GET /api/tasks/analyze with an empty analysis cache
+    analyze_warm   GET /api/tasks/analyze with every analysis cached
+plus POST /api/token once (bcrypt cost does not depend on the user).
+Analyses only run for users with at most --analyze-max-tasks tasks.
+
+Results (p50/p95/p99 in ms, throughput in requests/s) are printed and
+optionally saved as JSON. With --baseline, metrics that got worse by more
+than --threshold are reported and the exit code is 1.
+
+The tables are dropped and recreated: never point --database-url at a
+database you care about.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_DATABASE_URL = "sqlite:///bench_api.db"
+PASSWORD = "bench-password"
+SCENARIOS_PER_SIZE = ("tasks_cold", "tasks_warm", "tasks_304", "tasks_page", "create", "delete", "analyze_cold", "analyze_warm")
+# Lower is better for latencies, higher for throughput
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def configure_environment(args):
+    """
+    Point the app at the stand-ins; must run before the app modules are imported
+    """
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DB_ASYNC_ENABLED"] = "false"
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("REDIS_LOG_SAMPLE_RATE", "0")
+    os.environ.setdefault("SERVER_TIMING_ENABLED", "false")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if args.database_url.startswith("sqlite:///"):
+        path = args.database_url[len("sqlite:///"):]
+        if os.path.exists(path):
+            os.remove(path)
+
+    import redis_app
+    if args.redis_url:
+        import redis
+        redis_app.redis_client = redis.Redis.from_url(args.redis_url)
+        redis_app._make_async_client = lambda: redis.asyncio.Redis.from_url(args.redis_url)
+    else:
+        import fakeredis
+        server = fakeredis.FakeServer()
+        redis_app.redis_client = fakeredis.FakeRedis(server=server, decode_responses=False)
+        redis_app._make_async_client = lambda: fakeredis.aioredis.FakeRedis(server=server, decode_responses=False)
+    redis_app.redis_client.flushdb()
+
+
+def seed(sizes, seed_value: int) -> dict:
+    """
+    Create one user per size with that many tasks
+    :return: {size: user_id}
+    """
+    import random
+    from sqlalchemy import insert
+
+    import crud
+    import models
+    from benchmarks.common import WORDS
+    from database import engine
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(seed_value)
+    hashed_password = crud.get_password_hash(PASSWORD)
+    now = datetime.utcnow()
+    users = {}
+    with engine.begin() as conn:
+        for size in sizes:
+            result = conn.execute(
+                insert(models.User).returning(models.User.id),
+                [{"email": f"bench-{size}@example.com", "hashed_password": hashed_password, "is_active": True}]
+            )
+            user_id = result.scalar_one()
+            users[size] = user_id
+            for offset in range(0, size, 10000):
+                conn.execute(insert(models.Task), [
+                    {
+                        "title": " ".join(rng.choices(WORDS, k=3)).capitalize(),
+                        "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 30))),
+                        "completed": rng.random() < 0.4,
+                        "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+                        "user_id": user_id
+                    }
+                    for _ in range(min(10000, size - offset))
+                ])
+    return users
+
+
+def clear_analysis_cache():
+    import redis_app
+    from assistant.analysis_cache import ANALYSIS_CACHE_PREFIX, analysis_cache
+
+    analysis_cache.local.clear()
+    keys = list(redis_app.redis_client.scan_iter(match=ANALYSIS_CACHE_PREFIX + "*", count=1000))
+    if keys:
+        redis_app.redis_client.delete(*keys)
+
+
+async def run_scenario(requests: int, concurrency: int, send, before=None) -> dict:
+    """
+    Call `send(i)` `requests` times with up to `concurrency` in flight
+    :param send: async callable returning an httpx.Response
+    :param before: optional sync callable run before each request, not timed
+    """
+    from benchmarks.common import summarize
+
+    samples = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if before is not None:
+                before()
+            start = time.perf_counter()
+            response = await send(i)
+            samples.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    result = summarize(samples)
+    result["errors"] = errors
+    result["throughput_rps"] = round(len(samples) / wall, 2) if wall else 0.0
+    return result
+
+
+async def run_benchmarks(args, users: dict) -> dict:
+    import httpx
+
+    import main
+    from task_cache import TaskCache
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        async def token(size):
+            return await client.post(
+                "/api/token",
+                data={"username": f"bench-{size}@example.com", "password": PASSWORD}
+            )
+
+        results["token"] = await run_scenario(args.token_requests, args.concurrency, lambda i: token(args.sizes[0]))
+        print({"scenario": "token", **results["token"]})
+
+        for size, user_id in users.items():
+            response = await token(size)
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            size_results = results[f"tasks_{size}"] = {}
+
+            async def get(path, headers=headers):
+                return await client.get(path, headers=headers)
+
+            size_results["tasks_cold"] = await run_scenario(
+                args.cold_requests, 1, lambda i: get("/api/tasks"), lambda: TaskCache.invalidate(user_id)
+            )
+            etag = (await get("/api/tasks")).headers["ETag"]
+            size_results["tasks_warm"] = await run_scenario(
+                args.requests, args.concurrency, lambda i: get("/api/tasks")
+            )
+            size_results["tasks_304"] = await run_scenario(
+                args.requests, args.concurrency, lambda i: get("/api/tasks", {**headers, "If-None-Match": etag})
+            )
+            size_results["tasks_page"] = await run_scenario(
+                args.requests, args.concurrency, lambda i: get("/api/tasks?limit=50")
+            )
+
+            created = []
+
+            async def create(i):
+                response = await client.post(
+                    "/api/tasks",
+                    json={"title": f"Bench task {i}", "description": "created by bench_api"},
+                    headers=headers
+                )
+                if response.status_code < 400:
+                    created.append(response.json()["id"])
+                return response
+
+            async def delete(i):
+                return await client.delete(f"/api/tasks/{created[i]}", headers=headers)
+
+            size_results["create"] = await run_scenario(args.requests, args.concurrency, create)
+            size_results["delete"] = await run_scenario(len(created), args.concurrency, delete)
+
+            if size <= args.analyze_max_tasks:
+                size_results["analyze_cold"] = await run_scenario(
+                    args.analyze_requests, 1, lambda i: get("/api/tasks/analyze"), clear_analysis_cache
+                )
+                await get("/api/tasks/analyze")
+                size_results["analyze_warm"] = await run_scenario(
+                    args.analyze_requests, args.concurrency, lambda i: get("/api/tasks/analyze")
+                )
+
+            for name in SCENARIOS_PER_SIZE:
+                if name in size_results:
+                    print({"tasks": size, "scenario": name, **size_results[name]})
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    :return: Human-readable regressions of `results` against `baseline`
+    """
+    regressions = []
+
+    def walk(current, previous, path):
+        if "p50_ms" in current:
+            for metric in COMPARED_METRICS:
+                old, new = previous.get(metric), current.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                worse = change < -threshold if metric == "throughput_rps" else change > threshold
+                if worse:
+                    regressions.append(f"{path} {metric}: {old} -> {new} ({change:+.0%})")
+            return
+        for key, value in current.items():
+            if key in previous:
+                walk(value, previous[key], f"{path}/{key}" if path else key)
+
+    walk(results, baseline.get("results", {}), "")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma-separated task counts, one user each")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--cold-requests", type=int, default=20)
+    parser.add_argument("--token-requests", type=int, default=10)
+    parser.add_argument("--analyze-requests", type=int, default=5)
+    parser.add_argument("--analyze-max-tasks", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=int, default=50)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--redis-url", help="Use a real Redis instead of fakeredis")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Save the results as JSON")
+    parser.add_argument("--baseline", help="Compare against a JSON file saved with --output")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change reported as a regression")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+
+    configure_environment(args)
+    seed_start = time.perf_counter()
+    users = seed(args.sizes, args.seed)
+    print({"seeded_users": len(users), "seconds": round(time.perf_counter() - seed_start, 2)})
+
+    results = asyncio.run(run_benchmarks(args, users))
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Bulk task endpoints' database path vs. the one-at-a-time path.
+
+    python -m benchmarks.bench_bulk_tasks --tasks 500
+    python -m benchmarks.bench_bulk_tasks --database-url postgresql://user:pw@localhost:5434/bench
+
+Creates and deletes --tasks tasks with create_user_task/delete_task (one
+commit each) and with create_user_tasks/delete_user_tasks (one statement
+and one commit per batch), counting SQL statements and wall time.
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import models
+import schemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--database-url", default="sqlite:///bench_bulk.db")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *_: statements.__setitem__(0, statements[0] + 1))
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+    user = models.User(email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    payload = [schemas.TaskCreate(title=f"Task {i}", description="bulk benchmark") for i in range(args.tasks)]
+
+    def measure(name, fn):
+        statements[0] = 0
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print({"operation": name, "tasks": args.tasks, "seconds": round(elapsed, 4), "sql_statements": statements[0]})
+
+    created = []
+    measure("create one-by-one", lambda: created.extend(
+        crud.create_user_task(db, task, user.id).id for task in payload
+    ))
+    measure("delete one-by-one", lambda: [crud.delete_task(db, task_id, user.id) for task_id in created])
+
+    created_bulk = []
+    measure("create bulk", lambda: created_bulk.extend(
+        task["id"] for task in crud.create_user_tasks(db, payload, user.id)
+    ))
+    measure("complete bulk", lambda: crud.update_user_tasks(db, created_bulk, user.id, {"completed": True}))
+    measure("delete bulk", lambda: crud.delete_user_tasks(db, created_bulk, user.id))
+
+    db.close()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
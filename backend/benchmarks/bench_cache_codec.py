@@ -0,0 +1,72 @@
+"""
+Cache payload codecs: size and CPU per encode/decode of a task list, and
+the /api/tasks hit path (parse + re-validate vs. sending stored bytes).
+
+    python -m benchmarks.bench_cache_codec --tasks 5000
+
+Pass --codec/--compression combinations through the CACHE_* environment
+variables to compare, e.g. CACHE_CODEC=msgpack CACHE_COMPRESSION=lz4.
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+import cache_codec
+from benchmarks.common import make_tasks
+from schemas import Task
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) / repeat * 1e6, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tasks = [
+        {
+            "id": t.id,
+            "title": t.title,
+            "description": t.description,
+            "completed": t.completed,
+            "created_at": t.created_at.isoformat(),
+            "user_id": t.user_id
+        }
+        for t in make_tasks(args.tasks)
+    ]
+    stdlib = json.dumps(tasks).encode()
+    encoded = cache_codec.encode(tasks)
+    adapter = TypeAdapter(List[Task])
+
+    print({
+        "codec": cache_codec.CACHE_CODEC,
+        "compression": cache_codec.CACHE_COMPRESSION,
+        "orjson": cache_codec.orjson is not None,
+        "stdlib_json_bytes": len(stdlib),
+        "stored_bytes": len(encoded)
+    })
+    print({
+        "stdlib json.dumps_us": per_call_us(lambda: json.dumps(tasks), args.repeat),
+        "stdlib json.loads_us": per_call_us(lambda: json.loads(stdlib), args.repeat),
+        "encode_us": per_call_us(lambda: cache_codec.encode(tasks), args.repeat),
+        "decode_us": per_call_us(lambda: cache_codec.decode(encoded), args.repeat)
+    })
+    print({
+        "hit_old_path_us (loads + List[Task] validation + dumps)": per_call_us(
+            lambda: adapter.dump_json(adapter.validate_python(json.loads(stdlib))), args.repeat
+        ),
+        "hit_raw_bytes_us": per_call_us(lambda: cache_codec.decode_to_json_bytes(encoded), args.repeat)
+    })
+
+
+if __name__ == "__main__":
+    main()
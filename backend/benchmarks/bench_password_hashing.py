@@ -0,0 +1,82 @@
+"""
+Login throughput of the bcrypt pool and its effect on the event loop.
+
+    python -m benchmarks.bench_password_hashing --rounds 12 --verifies 40
+
+For 1..--max-workers pool threads it runs --verifies concurrent password
+checks through PasswordHasher and reports verifies/s and verifies/s per
+core in use. It then measures the event loop's worst scheduling delay
+while the same checks run inline (the old synchronous path) vs. in the pool.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+async def loop_lag(work) -> float:
+    """
+    Worst delay of a 5 ms ticker while `work` runs on the loop
+    """
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst = max(worst, time.perf_counter() - start - 0.005)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    await work()
+    done = True
+    await task
+    return worst
+
+
+async def main_async(args):
+    from password_hashing import PasswordHasher, pwd_context
+
+    hashed = pwd_context.hash("benchmark-password")
+    cores = os.cpu_count() or 1
+
+    for workers in range(1, args.max_workers + 1):
+        hasher = PasswordHasher(workers=workers, max_pending=args.verifies)
+        start = time.perf_counter()
+        await asyncio.gather(*(hasher.verify("benchmark-password", hashed) for _ in range(args.verifies)))
+        rate = args.verifies / (time.perf_counter() - start)
+        print({
+            "rounds": args.rounds,
+            "workers": workers,
+            "verifies_per_s": round(rate, 2),
+            "verifies_per_s_per_core": round(rate / min(workers, cores), 2)
+        })
+
+    async def inline():
+        for _ in range(args.verifies):
+            pwd_context.verify("benchmark-password", hashed)
+
+    hasher = PasswordHasher(workers=min(args.max_workers, cores), max_pending=args.verifies)
+
+    async def pooled():
+        await asyncio.gather(*(hasher.verify("benchmark-password", hashed) for _ in range(args.verifies)))
+
+    print({"path": "inline", "max_loop_lag_ms": round(await loop_lag(inline) * 1000, 1)})
+    print({"path": "pool", "max_loop_lag_ms": round(await loop_lag(pooled) * 1000, 1)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--verifies", type=int, default=40)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    # Read by password_hashing at import time
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+PriorityRanker: time to rank N pending tasks (NumPy + argpartition vs.
+the pure-Python + heapq fallback vs. a full sort). The workload ranks a
+few hundred candidates (see crud.get_priority_candidates); larger --tasks
+show how the cost grows per task.
+
+    python -m benchmarks.bench_priority_ranker --tasks 600
+"""
+import argparse
+import time
+
+from assistant import priority_ranker
+from assistant.priority_ranker import PriorityRanker
+from benchmarks.common import make_tasks
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=600)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tasks = [task for task in make_tasks(args.tasks) if not task.completed]
+    ranker = PriorityRanker()
+    numpy_module = priority_ranker.np
+
+    scores = ranker.score(tasks)
+    results = {"pending_tasks": len(tasks)}
+    results["score_ms"] = round(best_of(lambda: ranker.score(tasks), args.repeat) * 1000, 2)
+    if numpy_module is not None:
+        results["top_k_argpartition_ms"] = round(best_of(lambda: ranker.top_k(scores, args.k), args.repeat) * 1000, 3)
+        results["full_sort_ms"] = round(best_of(lambda: numpy_module.argsort(-scores), args.repeat) * 1000, 3)
+    results["rank_ms"] = round(best_of(lambda: ranker.rank(tasks, args.k), args.repeat) * 1000, 2)
+
+    # Pure-Python fallback
+    priority_ranker.np = None
+    try:
+        results["rank_without_numpy_ms"] = round(best_of(lambda: ranker.rank(tasks, args.k), args.repeat) * 1000, 2)
+    finally:
+        priority_ranker.np = numpy_module
+
+    print(results)
+    for task in ranker.rank(tasks, args.k):
+        print(task)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Calls and tokens per 100 tasks: one request per task vs. batched prompts.
+
+    python -m benchmarks.bench_prompt_batching --tasks 100
+
+Token counts come from the fake LLM's estimate (about 4 characters per
+token), which is close enough to compare the two modes.
+"""
+import argparse
+import asyncio
+import time
+
+from assistant.analysis_engine import AnalysisEngine
+from assistant.fake_llm import FakeLLMClient
+from benchmarks.common import make_tasks
+
+
+async def run(tasks, mode: str, latency: float, budget: int, max_tasks: int) -> dict:
+    client = FakeLLMClient(latency=latency)
+    engine = AnalysisEngine(
+        client,
+        mode=mode,
+        batch_token_budget=budget,
+        batch_max_tasks=max_tasks
+    )
+    start = time.perf_counter()
+    results = await engine.analyze_tasks(tasks)
+    elapsed = time.perf_counter() - start
+    scale = 100 / len(tasks)
+    return {
+        "mode": mode,
+        "succeeded": sum(1 for r in results if r["success"]),
+        "calls_per_100": round(client.calls * scale, 1),
+        "prompt_tokens_per_100": round(client.prompt_tokens * scale),
+        "completion_tokens_per_100": round(client.completion_tokens * scale),
+        "seconds": round(elapsed, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--token-budget", type=int, default=3500)
+    parser.add_argument("--max-tasks", type=int, default=15)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.tasks)
+    for mode in ("per_task", "batched"):
+        print(asyncio.run(run(tasks, mode, args.latency_ms / 1000, args.token_budget, args.max_tasks)))
+
+
+if __name__ == "__main__":
+    main()
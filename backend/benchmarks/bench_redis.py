@@ -0,0 +1,62 @@
+"""
+RedisService micro-benchmarks: per-key calls vs. MGET/pipelined helpers,
+and SET+EXPIRE vs. SET EX.
+
+    python -m benchmarks.bench_redis --redis-url redis://localhost:6379/15
+    python -m benchmarks.bench_redis --fake      # fakeredis, no server
+
+Against fakeredis there is no network, so timings only show client-side
+overhead; run against a local Redis to see the round-trip savings.
+"""
+import argparse
+import json
+import time
+
+import redis
+
+import redis_app
+from redis_app import RedisService
+
+
+def timed(name: str, keys: int, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print({"operation": name, "keys": keys, "ms": round(elapsed * 1000, 2), "us_per_key": round(elapsed / keys * 1e6, 2)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--fake", action="store_true", help="use fakeredis instead of a server")
+    parser.add_argument("--keys", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.fake:
+        import fakeredis
+        redis_app.redis_client = fakeredis.FakeRedis(decode_responses=False)
+    else:
+        redis_app.redis_client = redis.Redis.from_url(args.redis_url, decode_responses=False)
+    client = redis_app.redis_client
+
+    keys = [f"bench:{i}" for i in range(args.keys)]
+    value = {"id": 1, "title": "Benchmark task", "description": "x" * 200, "completed": False}
+    mapping = {key: value for key in keys}
+
+    def set_then_expire():
+        for key in keys:
+            client.set(key, json.dumps(value))
+            client.expire(key, 300)
+
+    timed("SET + EXPIRE (old set_key)", args.keys, set_then_expire)
+    timed("set_key (SET EX)", args.keys, lambda: [RedisService.set_key(key, value, expire_seconds=300) for key in keys])
+    timed("set_many (pipeline)", args.keys, lambda: RedisService.set_many(mapping, expire_seconds=300))
+    timed("get_key loop", args.keys, lambda: [RedisService.get_key(key) for key in keys])
+    timed("get_many (MGET)", args.keys, lambda: RedisService.get_many(keys))
+    timed("delete_key loop", args.keys, lambda: [RedisService.delete_key(key) for key in keys])
+    RedisService.set_many(mapping, expire_seconds=300)
+    timed("delete_many (DEL)", args.keys, lambda: RedisService.delete_many(keys))
+
+
+if __name__ == "__main__":
+    main()
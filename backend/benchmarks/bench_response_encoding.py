@@ -0,0 +1,121 @@
+"""
+Response rendering and compression: CPU per request and bytes on the wire
+for task lists and an /api/tasks/analyze report.
+
+    python -m benchmarks.bench_response_encoding --sizes 100,1000,10000
+
+Rendering paths, all from the dicts TaskCache returns:
+    validated_json    response_model validation + jsonable_encoder + JSONResponse (before)
+    validated_orjson  the same, rendered by ORJSONResponse
+    trusted_orjson    http_encoding.trusted_json: ORJSONResponse only (after)
+
+Compression of the rendered body with gzip at several levels, and brotli
+when it is installed. CPU is process time, so it doesn't include waiting.
+"""
+import argparse
+import asyncio
+import gzip
+import random
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from benchmarks.common import WORDS, make_tasks
+from http_encoding import trusted_json
+from schemas import Task
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return round((time.process_time() - start) / repeat * 1000, 3)
+
+
+def task_dicts(count: int) -> List[dict]:
+    return [
+        {
+            "id": task.id,
+            "title": task.title,
+            "description": task.description,
+            "completed": task.completed,
+            "created_at": task.created_at.isoformat(),
+            "user_id": task.user_id
+        }
+        for task in make_tasks(count)
+    ]
+
+
+def analysis_report(count: int) -> dict:
+    """
+    Shaped like TaskAnalyzer.abatch_analyze_tasks with ~1 KB of text per task
+    """
+    rng = random.Random(42)
+    return {
+        "summary": {"task_distribution": {"total_tasks": count}, "workload_status": "Moderate workload."},
+        "priority_tasks": [],
+        "individual_analyses": [
+            {
+                "task_id": i,
+                "analysis": "1. Priority Level: High\n2. " + " ".join(rng.choices(WORDS, k=150)),
+                "success": True
+            }
+            for i in range(count)
+        ],
+        "failed_task_ids": []
+    }
+
+
+def render_paths(content, response_model) -> dict:
+    field = create_response_field(name="Response", type_=response_model) if response_model else None
+
+    def validated(response_class):
+        encoded = asyncio.run(serialize_response(field=field, response_content=content))
+        return response_class(encoded).body
+
+    return {
+        "validated_json": lambda: validated(JSONResponse),
+        "validated_orjson": lambda: validated(ORJSONResponse),
+        "trusted_orjson": lambda: trusted_json(content).body
+    }
+
+
+def report(name: str, content, response_model, repeat: int) -> None:
+    paths = render_paths(content, response_model)
+    print({"payload": name, **{path: f"{cpu_ms(fn, repeat)} ms" for path, fn in paths.items()}})
+
+    body = paths["trusted_orjson"]()
+    sizes = {"raw_bytes": len(body)}
+    for level in (1, 5, 9):
+        sizes[f"gzip{level}"] = f"{len(gzip.compress(body, level))} B, {cpu_ms(lambda: gzip.compress(body, level), repeat)} ms"
+    if brotli is not None:
+        for quality in (4, 11):
+            sizes[f"brotli{quality}"] = (
+                f"{len(brotli.compress(body, quality=quality))} B, "
+                f"{cpu_ms(lambda: brotli.compress(body, quality=quality), max(1, repeat // 10))} ms"
+            )
+    print({"payload": name, **sizes})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated task counts")
+    parser.add_argument("--analyses", type=int, default=100, help="Tasks in the analysis report")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        report(f"tasks_{size}", task_dicts(size), List[Task], args.repeat)
+    report(f"analysis_{args.analyses}", analysis_report(args.analyses), None, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
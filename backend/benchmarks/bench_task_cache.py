@@ -0,0 +1,110 @@
+"""
+Database queries for the user task-list cache under a concurrent
+read/write mix (needs `pip install "fakeredis[lua]"`).
+
+    python -m benchmarks.bench_task_cache --readers 32 --seconds 5
+
+"naive" is the previous scheme: delete the key on write, and every reader
+that misses queries the database and refills the key. "task_cache" is
+TaskCache: versioned keys and single-flight rebuilds. The database is a
+loader that sleeps for --query-ms and counts calls.
+"""
+import argparse
+import threading
+import time
+
+import fakeredis
+
+import redis_app
+from task_cache import TaskCache
+from redis_app import RedisService
+
+USER_ID = 1
+
+
+class FakeDatabase:
+    def __init__(self, query_seconds: float):
+        self.query_seconds = query_seconds
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def load_tasks(self) -> list:
+        with self._lock:
+            self.queries += 1
+        time.sleep(self.query_seconds)
+        return [{"id": i, "title": f"Task {i}"} for i in range(100)]
+
+
+def naive_read(db: FakeDatabase):
+    key = f"user_tasks:{USER_ID}"
+    cached = RedisService.get_key(key)
+    if cached:
+        return cached
+    tasks = db.load_tasks()
+    RedisService.set_key(key, tasks)
+    return tasks
+
+
+def naive_write():
+    RedisService.delete_key(f"user_tasks:{USER_ID}")
+
+
+def cached_read(db: FakeDatabase):
+    return TaskCache.get_or_load(TaskCache.key(USER_ID), db.load_tasks)
+
+
+def cached_write():
+    TaskCache.invalidate(USER_ID)
+
+
+def run(name: str, read, write, args) -> dict:
+    redis_app.redis_client = fakeredis.FakeRedis(decode_responses=False)
+    db = FakeDatabase(args.query_ms / 1000)
+    stop = time.monotonic() + args.seconds
+    reads = writes = 0
+    counter_lock = threading.Lock()
+
+    def reader():
+        nonlocal reads
+        while time.monotonic() < stop:
+            read(db)
+            with counter_lock:
+                reads += 1
+
+    def writer():
+        nonlocal writes
+        while time.monotonic() < stop:
+            time.sleep(args.write_interval_ms / 1000)
+            write()
+            writes += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "scheme": name,
+        "reads": reads,
+        "writes": writes,
+        "db_queries": db.queries,
+        "queries_per_write": round(db.queries / max(writes, 1), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--query-ms", type=float, default=20)
+    parser.add_argument("--write-interval-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    print(run("naive", naive_read, naive_write, args))
+    print(run("task_cache", cached_read, cached_write, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Task search: full-text index vs. a LIKE/ILIKE scan.
+
+    python -m benchmarks.bench_task_search --tasks 1000000
+    python -m benchmarks.bench_task_search --database-url postgresql://user:pw@localhost:5434/bench
+
+Fills the tasks table with --tasks rows (titles and descriptions from
+benchmarks.common.WORDS plus a long tail of rare words), builds the index
+with task_search.ensure_search_index (GIN on Postgres, FTS5 on SQLite as a
+local stand-in) and times search_user_tasks for common, rare and two-word
+queries with the index and with the LIKE fallback. It also times inserts
+into the indexed table, i.e. the cost of keeping the index current, and
+ensure_search_index once the index exists (what every worker start pays;
+on Postgres it must only read the catalog, not take locks on tasks).
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import models
+from benchmarks.common import WORDS, summarize
+from task_search import BACKEND_LIKE, ensure_search_index, search_user_tasks
+
+RARE_WORDS = 50000
+INSERT_BATCH = 10000
+
+
+def make_rows(count: int, users: int, rng: random.Random, start_id: int = 1):
+    now = datetime.utcnow()
+
+    def words(k):
+        # About one word in ten comes from the long tail
+        return " ".join(
+            f"item{rng.randrange(RARE_WORDS)}" if rng.random() < 0.1 else rng.choice(WORDS) for _ in range(k)
+        )
+
+    return [
+        {
+            "id": start_id + i,
+            "title": words(3).capitalize(),
+            "description": words(rng.randint(0, 30)),
+            "completed": rng.random() < 0.4,
+            "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+            "user_id": (start_id + i) % users + 1
+        }
+        for i in range(count)
+    ]
+
+
+def insert_rows(engine, count: int, users: int, rng: random.Random, start_id: int) -> float:
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        for offset in range(0, count, INSERT_BATCH):
+            connection.execute(
+                insert(models.Task),
+                make_rows(min(INSERT_BATCH, count - offset), users, rng, start_id + offset)
+            )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--database-url", default="sqlite:///bench_search.db")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    engine = create_engine(args.database_url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [
+            {"id": i + 1, "email": f"bench{i}@example.com", "hashed_password": "x"} for i in range(args.users)
+        ])
+
+    load_seconds = insert_rows(engine, args.tasks, args.users, rng, start_id=1)
+    start = time.perf_counter()
+    backend = ensure_search_index(engine)
+    print({
+        "backend": backend,
+        "tasks": args.tasks,
+        "load_seconds": round(load_seconds, 1),
+        "index_build_seconds": round(time.perf_counter() - start, 1)
+    })
+
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        ensure_search_index(engine)
+        samples.append(time.perf_counter() - start)
+    print({"ensure_search_index": "index exists", **summarize(samples)})
+
+    db = sessionmaker(bind=engine)()
+    queries = {
+        "common word": [rng.choice(WORDS) for _ in range(args.queries)],
+        "rare word": [f"item{rng.randrange(RARE_WORDS)}" for _ in range(args.queries)],
+        "two words": [f"{rng.choice(WORDS)} item{rng.randrange(RARE_WORDS)}" for _ in range(args.queries)]
+    }
+    for kind, texts in queries.items():
+        for name, search_with in (("index", backend), ("like", BACKEND_LIKE)):
+            samples = []
+            for text in texts:
+                start = time.perf_counter()
+                search_user_tasks(db, 1, text, args.limit, backend=search_with)
+                samples.append(time.perf_counter() - start)
+            print({"query": kind, "search": name, **summarize(samples)})
+    db.close()
+
+    # Index maintenance on write (triggers / generated column)
+    rows = INSERT_BATCH
+    seconds = insert_rows(engine, rows, args.users, rng, start_id=args.tasks + 1)
+    print({"insert_rows_per_s": {"without_index": round(args.tasks / load_seconds), "with_index": round(rows / seconds)}})
+
+    engine.dispose()
+    if args.database_url.startswith("sqlite:///"):
+        os.remove(args.database_url[len("sqlite:///"):])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Shared helpers for the offline benchmark scripts.
+
+Run scripts from the backend directory, e.g.
+    python -m benchmarks.bench_analysis_engine
+"""
+import random
+import statistics
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+WORDS = [
+    "report", "review", "deploy", "invoice", "email", "meeting", "budget",
+    "design", "urgent", "refactor", "call", "plan", "docs", "release", "fix"
+]
+
+
+def make_tasks(count: int, seed: int = 42, user_id: int = 1) -> List[SimpleNamespace]:
+    """
+    Build synthetic task objects with the same attributes as models.Task
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=i + 1,
+            title=" ".join(rng.choices(WORDS, k=3)).capitalize(),
+            description=" ".join(rng.choices(WORDS, k=rng.randint(0, 30))),
+            completed=rng.random() < 0.4,
+            created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            user_id=user_id
+        )
+        for i in range(count)
+    ]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of `samples` (pct in 0..100)
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> dict:
+    """
+    p50/p95/p99/mean of latency samples given in seconds, reported in ms
+    """
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3)
+    }
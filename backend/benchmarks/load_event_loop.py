@@ -0,0 +1,77 @@
+"""
+Load test: /api/tasks latency while task analyses are running.
+
+Start the API with the fake LLM so analyses are slow but offline:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY_MS=500 uvicorn main:app --port 8000
+
+then (needs `pip install httpx`):
+
+    python -m benchmarks.load_event_loop --base-url http://localhost:8000
+
+The script measures p50/p99 for GET /api/tasks on an idle server and again
+while `--analyses` concurrent GET /api/tasks/analyze requests are in flight.
+With a non-blocking event loop the two p99 values stay close.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from benchmarks.common import summarize
+
+
+async def login(client: httpx.AsyncClient, tasks: int) -> dict:
+    email = f"load-{uuid.uuid4().hex[:8]}@example.com"
+    password = "load-test-password"
+    await client.post("/api/register", json={"email": email, "password": password})
+    response = await client.post("/api/token", data={"username": email, "password": password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    for i in range(tasks):
+        await client.post("/api/tasks", json={"title": f"Task {i}", "description": "load test"}, headers=headers)
+    return headers
+
+
+async def sample_tasks(client: httpx.AsyncClient, headers: dict, requests: int) -> list:
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get("/api/tasks", headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.analyses + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120, limits=limits) as client:
+        headers = await login(client, args.tasks)
+
+        idle = await sample_tasks(client, headers, args.requests)
+
+        analyses = [
+            asyncio.create_task(client.get("/api/tasks/analyze", headers=headers))
+            for _ in range(args.analyses)
+        ]
+        await asyncio.sleep(0.1)
+        busy = await sample_tasks(client, headers, args.requests)
+        await asyncio.gather(*analyses, return_exceptions=True)
+
+    print("idle:", summarize(idle))
+    print(f"with {args.analyses} analyses running:", summarize(busy))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--tasks", type=int, default=20, help="tasks created for the load-test user")
+    parser.add_argument("--analyses", type=int, default=10, help="concurrent /api/tasks/analyze requests")
+    parser.add_argument("--requests", type=int, default=200, help="GET /api/tasks samples per phase")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
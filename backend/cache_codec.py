@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import zlib
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+logger = logging.getLogger(__name__)
+
+# "json" (orjson when installed, else the stdlib) or "msgpack"
+CACHE_CODEC = os.getenv("CACHE_CODEC", "json")
+# "zlib", "lz4" or "none"; applied to payloads of at least the threshold size
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zlib")
+CACHE_COMPRESSION_THRESHOLD = int(os.getenv("CACHE_COMPRESSION_THRESHOLD", "1024"))
+CACHE_ZLIB_LEVEL = int(os.getenv("CACHE_ZLIB_LEVEL", "1"))
+
+# Encoded values start with MAGIC + codec byte + compression byte. Plain JSON
+# written before the codec layer existed never starts with a NUL byte, so it
+# is still readable.
+MAGIC = b"\x00"
+CODEC_JSON = b"j"
+CODEC_MSGPACK = b"m"
+COMPRESSION_NONE = b"-"
+COMPRESSION_ZLIB = b"z"
+COMPRESSION_LZ4 = b"l"
+HEADER_SIZE = 3
+
+if CACHE_CODEC == "msgpack" and msgpack is None:
+    logger.warning("CACHE_CODEC=msgpack but msgpack is not installed; using json")
+    CACHE_CODEC = "json"
+if CACHE_COMPRESSION == "lz4" and lz4 is None:
+    logger.warning("CACHE_COMPRESSION=lz4 but lz4 is not installed; using zlib")
+    CACHE_COMPRESSION = "zlib"
+
+
+def dumps_json(value: any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(data: bytes) -> any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _compress(payload: bytes) -> tuple:
+    if CACHE_COMPRESSION == "none" or len(payload) < CACHE_COMPRESSION_THRESHOLD:
+        return COMPRESSION_NONE, payload
+    if CACHE_COMPRESSION == "lz4":
+        return COMPRESSION_LZ4, lz4.frame.compress(payload)
+    return COMPRESSION_ZLIB, zlib.compress(payload, CACHE_ZLIB_LEVEL)
+
+
+def _decompress(compression: bytes, payload: bytes) -> bytes:
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_LZ4:
+        if lz4 is None:
+            raise ValueError("lz4-compressed cache value but lz4 is not installed")
+        return lz4.frame.decompress(payload)
+    return payload
+
+
+def encode(value: any) -> bytes:
+    """
+    Serialize a value for the cache with the configured codec and compression
+    """
+    if CACHE_CODEC == "msgpack":
+        codec, payload = CODEC_MSGPACK, msgpack.packb(value, use_bin_type=True)
+    else:
+        codec, payload = CODEC_JSON, dumps_json(value)
+    compression, payload = _compress(payload)
+    return MAGIC + codec + compression + payload
+
+
+def encode_json_bytes(data: bytes) -> bytes:
+    """
+    Wrap an already serialized JSON document (always stored as JSON so it
+    can be served as-is, see decode_to_json_bytes)
+    """
+    compression, payload = _compress(data)
+    return MAGIC + CODEC_JSON + compression + payload
+
+
+def _split(data) -> tuple:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if not data.startswith(MAGIC):
+        return CODEC_JSON, data
+    codec, compression = data[1:2], data[2:3]
+    return codec, _decompress(compression, data[HEADER_SIZE:])
+
+
+def decode(data) -> Optional[any]:
+    """
+    Deserialize a cached value (encoded or legacy plain JSON)
+    """
+    if data is None:
+        return None
+    codec, payload = _split(data)
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack cache value but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    return loads_json(payload)
+
+
+def decode_to_json_bytes(data) -> Optional[bytes]:
+    """
+    Byte-level fast path: the cached value as a JSON document, without
+    parsing it when it was stored as JSON
+    """
+    if data is None:
+        return None
+    codec, payload = _split(data)
+    if codec == CODEC_JSON:
+        return payload
+    return dumps_json(decode(data))
@@ -1,11 +1,30 @@
 from celery import Celery
+import os
 
 celery = Celery(
     'tasks',
-    broker='redis://redis:6379/0',
-    backend='redis://redis:6379/0'
+    broker=os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'),
+    backend=os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0'),
+    include=['tasks']
 )
 
 celery.conf.task_routes = {
     'tasks.*': {'queue': 'default'}
-} 
\ No newline at end of file
+}
+# Workers started without -Q must consume the queue the routes point at
+celery.conf.task_default_queue = 'default'
+celery.conf.task_track_started = True
+# How long job results (e.g. batch analyses) stay in the Redis backend
+celery.conf.result_expires = int(os.getenv('CELERY_RESULT_EXPIRES_SECONDS', str(24 * 3600)))
+
+# Periodic jobs; run `celery -A celery_app beat` next to the workers
+celery.conf.beat_schedule = {
+    'reconcile-task-stats': {
+        'task': 'tasks.reconcile_task_stats',
+        'schedule': float(os.getenv('TASK_STATS_RECONCILE_SECONDS', '3600')),
+    },
+    'requeue-uncategorized-notes': {
+        'task': 'tasks.requeue_uncategorized_notes',
+        'schedule': float(os.getenv('NOTE_REQUEUE_INTERVAL_SECONDS', '600')),
+    },
+}
@@ -1,28 +1,37 @@
+from sqlalchemy import Date, bindparam, cast, delete, func, insert, select, tuple_, update
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+import base64
+import json
 import os
 import models
 import schemas
 from database import get_db
+from principal_cache import PrincipalCache
+from task_stats import TaskStats
+from task_search import find_pending_tasks_with_words
+from profiling import span
+from password_hashing import password_hasher, pwd_context
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY")  # In production, use a secure secret key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/token")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    with span("bcrypt"):
+        return pwd_context.hash(password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -40,8 +49,9 @@ def get_user_by_email(db: Session, email: str):
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
@@ -56,45 +66,427 @@ def authenticate_user(db: Session, email: str, password: str):
         return False
     return user
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+def update_user_password_hash(db: Session, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+
+# Async variants for async endpoints: bcrypt runs in password_hasher's pool
+# and the database calls in the threadpool, so neither blocks the event loop
+async def acreate_user(db: Session, user: schemas.UserCreate):
+    hashed_password = await password_hasher.hash(user.password)
+    return await run_in_threadpool(create_user, db, user, hashed_password)
+
+async def aauthenticate_user(db: Session, email: str, password: str):
+    user = await run_in_threadpool(get_user_by_email, db, email)
+    valid, new_hash = await password_hasher.verify(password, user.hashed_password if user else None)
+    if not valid:
+        return False
+    if new_hash is not None:
+        await run_in_threadpool(update_user_password_hash, db, user, new_hash)
+    return user
+
+# Sync on purpose: FastAPI runs it in the threadpool, so the user lookup
+# doesn't block the event loop for async endpoints. Returns a cached
+# schemas.Principal; hits don't touch the database.
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with span("jwt"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
         token_data = schemas.TokenData(email=email)
     except JWTError:
         raise credentials_exception
-    user = get_user_by_email(db, email=token_data.email)
+
+    principal = PrincipalCache.get(token_data.email)
+    if principal is None:
+        user = get_user_by_email(db, email=token_data.email)
+        if user is None or not user.is_active:
+            raise credentials_exception
+        principal = schemas.Principal.model_validate(user)
+        PrincipalCache.set(principal)
+    return principal
+
+def deactivate_user(db: Session, user_id: int):
+    user = get_user(db, user_id)
     if user is None:
-        raise credentials_exception
+        return None
+    user.is_active = False
+    db.commit()
+    PrincipalCache.invalidate(user.email)
     return user
 
 # Task operations
 def get_user_tasks(db: Session, user_id: int):
     return db.query(models.Task).filter(models.Task.user_id == user_id).all()
 
+async def aget_user_tasks(db, user_id: int):
+    """
+    get_user_tasks for an AsyncSession (database.AsyncSessionLocal)
+    """
+    result = await db.scalars(select(models.Task).where(models.Task.user_id == user_id))
+    return result.all()
+
+def encode_task_cursor(task: models.Task) -> str:
+    raw = json.dumps([task.created_at.isoformat(), task.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_task_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor from encode_task_cursor
+    :raises ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(task_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+def get_user_tasks_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    title_prefix: Optional[str] = None
+) -> Tuple[List[models.Task], Optional[str]]:
+    """
+    Keyset-paginated tasks of a user, newest first
+    :return: (tasks, cursor of the next page or None on the last page)
+    """
+    query = db.query(models.Task).filter(models.Task.user_id == user_id)
+    if completed is not None:
+        query = query.filter(models.Task.completed == completed)
+    if title_prefix:
+        query = query.filter(models.Task.title.startswith(title_prefix, autoescape=True))
+    if cursor:
+        created_at, task_id = decode_task_cursor(cursor)
+        query = query.filter(tuple_(models.Task.created_at, models.Task.id) < tuple_(created_at, task_id))
+
+    tasks = query.order_by(models.Task.created_at.desc(), models.Task.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_task_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+    return tasks[:limit], next_cursor
+
+def get_user_task(db: Session, task_id: int, user_id: int):
+    return db.query(models.Task).filter(
+        models.Task.id == task_id,
+        models.Task.user_id == user_id
+    ).first()
+
 def create_user_task(db: Session, task: schemas.TaskCreate, user_id: int):
     db_task = models.Task(**task.dict(), user_id=user_id)
     db.add(db_task)
     db.commit()
     db.refresh(db_task)
+    TaskStats.tasks_committed(user_id, TaskStats.deltas([(db_task.completed, db_task.created_at)]))
     return db_task
 
 def delete_task(db: Session, task_id: int, user_id: int):
-    task = db.query(models.Task).filter(
-        models.Task.id == task_id,
-        models.Task.user_id == user_id
-    ).first()
+    task = get_user_task(db, task_id=task_id, user_id=user_id)
     
     if task is None:
         return None
-        
+
+    deltas = TaskStats.deltas([(task.completed, task.created_at)], sign=-1)
     db.delete(task)
     db.commit()
-    return task 
\ No newline at end of file
+    TaskStats.tasks_committed(user_id, deltas)
+    return task 
+
+def count_user_task_stats(db: Session, user_id: int) -> dict:
+    """
+    Task counters of a user computed in the database (see TaskStats)
+    """
+    total, completed = db.execute(
+        select(func.count(), func.count().filter(models.Task.completed.is_(True)))
+        .where(models.Task.user_id == user_id)
+    ).one()
+    day = func.date(models.Task.created_at)
+    days = db.execute(
+        select(day, func.count()).where(models.Task.user_id == user_id).group_by(day)
+    ).all()
+    # func.date returns a string on SQLite and a date on Postgres
+    return {"total": total, "completed": completed, "days": {str(d): count for d, count in days}}
+
+def get_pending_tasks(db: Session, user_id: int, limit: int) -> list:
+    """
+    Oldest pending tasks first, only the columns priority ranking needs
+    (rows with id, title, description, completed and created_at). Walks
+    ix_tasks_user_created_id in order and stops after `limit` matches.
+    """
+    return db.execute(
+        select(
+            models.Task.id,
+            models.Task.title,
+            models.Task.description,
+            models.Task.completed,
+            models.Task.created_at
+        )
+        .where(models.Task.user_id == user_id, models.Task.completed.is_not(True))
+        .order_by(models.Task.created_at, models.Task.id)
+        .limit(limit)
+    ).all()
+
+def get_priority_candidates(
+    db: Session,
+    user_id: int,
+    oldest: int,
+    keyword_tiers: List[Tuple[float, List[str]]],
+    with_keywords: int
+) -> list:
+    """
+    Pending tasks worth ranking for priority, whatever the size of the
+    backlog: the `oldest` oldest ones plus up to `with_keywords` that
+    mention urgency keywords (found through the full-text index, strongest
+    tier first, oldest first within a tier). Rows as in get_pending_tasks.
+    :param keyword_tiers: [(weight, words)], e.g. PriorityRanker.urgency_tiers
+    """
+    candidates = {row.id: row for row in get_pending_tasks(db, user_id, limit=oldest)}
+    budget = with_keywords
+    for _, words in keyword_tiers:
+        if budget <= 0:
+            break
+        found = find_pending_tasks_with_words(db, user_id, words, limit=budget)
+        budget -= len(found)
+        candidates.update((row.id, row) for row in found)
+    return list(candidates.values())
+
+TREND_BUCKETS = ("day", "week", "month")
+
+def _bucket_expression(db: Session, bucket: str):
+    """
+    SQL expression for the first day of the created_at bucket
+    """
+    column = models.Task.created_at
+    if db.get_bind().dialect.name == "sqlite":
+        modifiers = {"day": (), "week": ("weekday 0", "-6 days"), "month": ("start of month",)}[bucket]
+        return func.date(column, *modifiers)
+    if bucket == "day":
+        return cast(column, Date)
+    return cast(func.date_trunc(bucket, column), Date)
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def get_user_task_trends(db: Session, user_id: int, days: int, bucket: str = "day") -> List[dict]:
+    """
+    Tasks created per day/week/month over the last `days` days and how
+    many of them are completed, aggregated in the database (weeks start
+    on Monday). The range is extended back to the start of the first
+    week/month so that it is counted in full, like the other buckets.
+    Buckets without tasks are included with zero counts.
+    :return: [{"period": "YYYY-MM-DD", "created", "completed", "completion_rate"}], oldest first
+    """
+    today = datetime.utcnow().date()
+    since = _bucket_start(today - timedelta(days=days - 1), bucket)
+    period = _bucket_expression(db, bucket)
+    rows = db.execute(
+        select(period, func.count(), func.count().filter(models.Task.completed.is_(True)))
+        .where(models.Task.user_id == user_id, models.Task.created_at >= datetime.combine(since, datetime.min.time()))
+        .group_by(period)
+    ).all()
+    # SQLite returns the bucket as a string, Postgres as a date
+    counts = {str(start): (created, completed) for start, created, completed in rows}
+
+    trends = []
+    start = since
+    while start <= today:
+        created, completed = counts.get(start.isoformat(), (0, 0))
+        trends.append({
+            "period": start.isoformat(),
+            "created": created,
+            "completed": completed,
+            "completion_rate": round(completed / created * 100, 2) if created else 0
+        })
+        if bucket == "month":
+            start = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            start += timedelta(days=7 if bucket == "week" else 1)
+    return trends
+
+# Bulk task operations: one statement and one commit per batch
+def create_user_tasks(db: Session, tasks: List[schemas.TaskCreate], user_id: int) -> List[dict]:
+    """
+    Insert many tasks with a single INSERT ... RETURNING
+    :return: Created tasks as dicts (serialized before the commit expires them)
+    """
+    rows = [{**task.dict(), "user_id": user_id} for task in tasks]
+    created = db.scalars(insert(models.Task).returning(models.Task), rows).all()
+    result = [task.to_dict() for task in created]
+    deltas = TaskStats.deltas((task.completed, task.created_at) for task in created)
+    db.commit()
+    TaskStats.tasks_committed(user_id, deltas)
+    return result
+
+def update_user_tasks(db: Session, task_ids: List[int], user_id: int, values: dict) -> List[int]:
+    """
+    Update the given tasks of a user in one statement (two when
+    `completed` changes, to count the tasks that actually flipped)
+    :return: Ids of the updated tasks (ids of missing tasks or of other
+             users' tasks are left out)
+    """
+    statement = (
+        update(models.Task)
+        .where(models.Task.user_id == user_id, models.Task.id.in_(task_ids))
+        .values(**values)
+        .returning(models.Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    if "completed" not in values:
+        updated = db.scalars(statement).all()
+        db.commit()
+        if updated:
+            TaskStats.tasks_committed(user_id, {})
+        return updated
+
+    was_completed = models.Task.completed.is_(True)
+    flips = was_completed if not values["completed"] else ~was_completed
+    # Tasks already in the target state first: after the flip they all are
+    unchanged = db.scalars(statement.where(~flips)).all()
+    flipped = db.scalars(statement.where(flips)).all()
+    db.commit()
+    if unchanged or flipped:
+        TaskStats.tasks_committed(user_id, {"completed": len(flipped) if values["completed"] else -len(flipped)})
+    return unchanged + flipped
+
+def delete_user_tasks(db: Session, task_ids: List[int], user_id: int) -> List[int]:
+    """
+    Delete the given tasks of a user in one statement
+    :return: Ids of the deleted tasks
+    """
+    deleted = db.execute(
+        delete(models.Task)
+        .where(models.Task.user_id == user_id, models.Task.id.in_(task_ids))
+        .returning(models.Task.id, models.Task.completed, models.Task.created_at)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    if deleted:
+        TaskStats.tasks_committed(
+            user_id, TaskStats.deltas(((row.completed, row.created_at) for row in deleted), sign=-1)
+        )
+    return [row.id for row in deleted]
+
+# Notes
+def create_user_note(db: Session, note: schemas.NoteCreate, user_id: int) -> models.Note:
+    db_note = models.Note(**note.dict(), user_id=user_id)
+    db.add(db_note)
+    db.commit()
+    db.refresh(db_note)
+    return db_note
+
+def get_user_note(db: Session, note_id: int, user_id: int) -> Optional[models.Note]:
+    return db.query(models.Note).filter(models.Note.id == note_id, models.Note.user_id == user_id).first()
+
+def get_user_notes_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    ai_category: Optional[models.NoteCategory] = None
+) -> Tuple[List[models.Note], Optional[str]]:
+    """
+    Keyset-paginated notes of a user, newest first (cursors as for tasks)
+    :return: (notes, cursor of the next page or None on the last page)
+    """
+    query = db.query(models.Note).filter(models.Note.user_id == user_id)
+    if ai_category is not None:
+        query = query.filter(models.Note.ai_category == ai_category)
+    if cursor:
+        created_at, note_id = decode_task_cursor(cursor)
+        query = query.filter(tuple_(models.Note.created_at, models.Note.id) < tuple_(created_at, note_id))
+
+    notes = query.order_by(models.Note.created_at.desc(), models.Note.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_task_cursor(notes[limit - 1]) if len(notes) > limit else None
+    return notes[:limit], next_cursor
+
+def update_user_note(db: Session, note: models.Note, values: dict) -> bool:
+    """
+    Apply `values` to a note; a new title or content clears the AI
+    category so the note is categorized again. A None title is ignored
+    (notes always have one).
+    :return: True if the note needs categorization
+    """
+    values = {field: value for field, value in values.items() if value is not None or field != "title"}
+    changed = any(
+        field in values and values[field] != getattr(note, field) for field in ("title", "content")
+    )
+    for field, value in values.items():
+        setattr(note, field, value)
+    if changed:
+        note.ai_category = None
+        note.ai_explanation = None
+    db.commit()
+    db.refresh(note)
+    return changed
+
+def delete_user_note(db: Session, note: models.Note) -> None:
+    db.delete(note)
+    db.commit()
+
+def get_notes_by_ids(db: Session, note_ids: List[int]) -> List[models.Note]:
+    """
+    Notes with the given ids that still need categorization
+    """
+    return db.scalars(
+        select(models.Note).where(models.Note.id.in_(note_ids), models.Note.ai_category.is_(None))
+    ).all()
+
+def set_note_categories(db: Session, notes: List[models.Note], results: dict) -> int:
+    """
+    Write AI categories back in one executemany UPDATE. Notes whose title
+    or content changed since they were loaded are skipped (the edit
+    queued them again).
+    :param notes: Notes as loaded before categorizing
+    :param results: {note_id: (NoteCategory, explanation)}
+    :return: Number of notes updated
+    """
+    rows = [
+        {
+            "note_id": note.id,
+            "loaded_title": note.title,
+            "loaded_content": note.content,
+            "new_category": results[note.id][0],
+            "new_explanation": results[note.id][1]
+        }
+        for note in notes
+        if note.id in results
+    ]
+    if not rows:
+        return 0
+    table = models.Note.__table__
+    updated = db.execute(
+        update(table)
+        .where(
+            table.c.id == bindparam("note_id"),
+            table.c.title.is_not_distinct_from(bindparam("loaded_title")),
+            table.c.content.is_not_distinct_from(bindparam("loaded_content"))
+        )
+        .values(ai_category=bindparam("new_category"), ai_explanation=bindparam("new_explanation")),
+        rows
+    ).rowcount
+    db.commit()
+    return updated
+
+def get_uncategorized_notes(db: Session, created_before: datetime, limit: int, after_id: int = 0) -> list:
+    """
+    Uncategorized notes by id, as rows of (id, title, content)
+    :param after_id: Id of the last note of the previous page
+    """
+    note = models.Note
+    return db.execute(
+        select(note.id, note.title, note.content)
+        .where(note.ai_category.is_(None), note.created_at < created_before, note.id > after_id)
+        .order_by(note.id)
+        .limit(limit)
+    ).all()
@@ -1,27 +1,168 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+try:
+    import asyncpg  # noqa: F401 - only needed for the optional async engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:
+    asyncpg = None
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT")
+POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+)
+
+# Pool settings; size them so workers * (pool_size + max_overflow) stays
+# below the server's max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# Use the asyncpg engine in async endpoints (requires asyncpg)
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+
+# Checkouts slower than this are counted as having waited for the pool
+SLOW_CHECKOUT_SECONDS = 0.01
+
+
+class PoolStats:
+    """
+    Connection checkout wait times, shared by the sync and async pools
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait >= SLOW_CHECKOUT_SECONDS:
+                self.slow_checkouts += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "slow_checkouts": self.slow_checkouts,
+            "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3)
+        }
+
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+pool_stats = PoolStats()
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+class _TimedCheckoutMixin:
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record(time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection
+    """
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """
+    Async counterpart of TimedQueuePool
+    """
+
+
+def _engine_options(url: str, timeout_args: dict) -> dict:
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": timeout_args if DB_STATEMENT_TIMEOUT_MS else {}
+    }
+
+
+engine_options = _engine_options(
+    SQLALCHEMY_DATABASE_URL,
+    {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+)
+if not SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    engine_options["poolclass"] = TimedQueuePool
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional asyncpg engine for async endpoints
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC_ENABLED and asyncpg is not None and SQLALCHEMY_DATABASE_URL.startswith("postgresql://"):
+    async_engine = create_async_engine(
+        SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+        poolclass=TimedAsyncQueuePool,
+        **_engine_options(
+            SQLALCHEMY_DATABASE_URL,
+            {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        )
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+elif DB_ASYNC_ENABLED:
+    logger.warning("DB_ASYNC_ENABLED is set but asyncpg is not installed; using the sync engine")
+
 Base = declarative_base()
 
 def get_db():
+    # Sessions are lazy: no connection is checked out until the first query
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_pool_stats() -> dict:
+    """
+    Current pool usage and checkout wait metrics
+    """
+    stats = {"checkout_wait": pool_stats.to_dict()}
+    pools = {"sync": engine.pool}
+    if async_engine is not None:
+        pools["async"] = async_engine.pool
+    for name, pool in pools.items():
+        if isinstance(pool, QueuePool):
+            stats[name] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            }
+    return stats
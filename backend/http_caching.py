@@ -0,0 +1,84 @@
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Cache-Control sent per route (method, path template); a header set by the
+# endpoint itself wins. Views of the user's tasks carry an ETag derived from
+# their TaskCache version: "no-cache" makes clients revalidate on every
+# poll, which costs a 304 and no body while nothing changed.
+CACHE_CONTROL = {
+    ("GET", "/api/tasks"): "private, no-cache",
+    ("GET", "/api/tasks/search"): "private, no-cache",
+    ("GET", "/api/tasks/workload"): "private, no-cache",
+    ("GET", "/api/tasks/trends"): "private, no-cache",
+    # Credentials and progress that is stale the moment it is read
+    ("POST", "/api/token"): "no-store",
+    ("POST", "/api/register"): "no-store",
+    ("GET", "/api/me"): "private, no-store",
+    ("GET", "/api/tasks/analyze/jobs/{job_id}"): "no-store",
+    ("GET", "/metrics"): "no-store",
+}
+
+
+def task_etag(user_id: int, version: Optional[int], *variant) -> Optional[str]:
+    """
+    Weak ETag of a view of the user's tasks: changes whenever the user's
+    TaskCache version does (every write bumps it)
+    :param version: TaskCache.current_version; None (Redis unavailable) means no ETag
+    :param variant: What else the body depends on: route, query parameters, ...
+    """
+    if version is None:
+        return None
+    digest = hashlib.sha1(json.dumps(variant, default=str).encode()).hexdigest()[:16]
+    return f'W/"{user_id}-{version}-{digest}"'
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    """
+    Whether the request's If-None-Match matches `etag` (weak comparison)
+    """
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = _opaque_tag(etag)
+    return any(_opaque_tag(tag.strip()) == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def _opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+class CacheControlMiddleware:
+    """
+    ASGI middleware adding the Cache-Control header of CACHE_CONTROL to
+    responses of the matched route
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache_control(message):
+            if message["type"] == "http.response.start":
+                # The router stored the matched route in the scope by now
+                route = getattr(scope.get("route"), "path", None)
+                policy = CACHE_CONTROL.get((scope["method"], route))
+                headers = list(message.get("headers", []))
+                if policy and not any(name.lower() == b"cache-control" for name, _ in headers):
+                    headers.append((b"cache-control", policy.encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_control)
@@ -0,0 +1,101 @@
+import gzip
+import os
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+from lru import LRUCache
+from task_cache import TASK_CACHE_TTL_SECONDS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Responses smaller than this are sent uncompressed (headers and CPU would
+# cost more than the bytes saved)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# gzip 1-9; past 5 JSON barely shrinks while CPU time keeps growing
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+# Brotli 0-11 (when brotli-asgi is installed)
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# Streams must reach the client event by event; compressors buffer them
+UNCOMPRESSED_PATHS = {"/api/tasks/analyze/stream"}
+# Gzipped bodies of cached responses kept per process (see cached_json_response)
+COMPRESSED_CACHE_ENTRIES = int(os.getenv("COMPRESSED_CACHE_ENTRIES", "32"))
+
+_compressed = LRUCache(COMPRESSED_CACHE_ENTRIES, TASK_CACHE_TTL_SECONDS, name="compressed_response")
+
+# Default response class of the app
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def trusted_json(content: any, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    """
+    Send data that already has the shape of the route's response_model,
+    e.g. to_dict() output read from TaskCache, without validating it
+    against the model and walking it with jsonable_encoder again
+    :param content: JSON-serializable value
+    """
+    return DefaultJSONResponse(content, headers=headers)
+
+
+def cached_json_response(
+    request: Request,
+    cache_key: str,
+    body: bytes,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Send JSON bytes read from TaskCache. When the client accepts gzip the
+    body is compressed once per process and cache key (keys are versioned,
+    so the body behind one never changes) rather than on every request;
+    CompressionMiddleware leaves the encoded response alone.
+    """
+    headers = dict(headers or {})
+    if len(body) >= COMPRESSION_MIN_SIZE and "gzip" in request.headers.get("accept-encoding", ""):
+        compressed = _compressed.get(cache_key)
+        if compressed is None:
+            compressed = gzip.compress(body, COMPRESSION_GZIP_LEVEL)
+            _compressed.set(cache_key, compressed)
+        body = compressed
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware: brotli when brotli-asgi is installed and the client
+    accepts it, else gzip, for responses of at least COMPRESSION_MIN_SIZE
+    bytes. UNCOMPRESSED_PATHS are passed through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        if BrotliMiddleware is not None:
+            self.compressed = BrotliMiddleware(
+                app,
+                quality=COMPRESSION_BROTLI_QUALITY,
+                minimum_size=COMPRESSION_MIN_SIZE,
+                gzip_fallback=True
+            )
+        else:
+            self.compressed = GZipMiddleware(
+                app,
+                minimum_size=COMPRESSION_MIN_SIZE,
+                compresslevel=COMPRESSION_GZIP_LEVEL
+            )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await self.compressed(scope, receive, send)
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from metrics import cache_requests
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with per-entry TTL
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: Optional[str] = None):
+        """
+        :param name: Label for hit/miss metrics; unnamed caches are not counted
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[any]:
+        value = self._get(key)
+        if self.name is not None:
+            cache_requests.inc("local", self.name, "miss" if value is None else "hit")
+        return value
+
+    def _get(self, key: str) -> Optional[any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
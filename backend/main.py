@@ -1,36 +1,90 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from jose import jwt
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 from typing import List, Optional
-from redis_app import RedisService
+from redis_app import AsyncRedisService, RedisService
+from task_cache import TaskCache
+from task_stats import TaskStats
+from task_search import SEARCH_CACHE_TTL_SECONDS, ensure_search_index, search_user_tasks
+from task_events import get_task_event_hub, publish_task_event
 from datetime import datetime, timedelta
 import os
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
 import models
 from dotenv import load_dotenv
 # Change these from relative imports to absolute imports
-from database import get_db, engine
+from database import get_db, get_pool_stats, engine, AsyncSessionLocal, SessionLocal
 from models import Base
+from metrics import registry
+from profiling import TimingMiddleware
+from http_caching import CacheControlMiddleware, is_not_modified, not_modified, task_etag
+from http_encoding import CompressionMiddleware, DefaultJSONResponse, cached_json_response, trusted_json
+from password_hashing import PasswordHasherBusy
+from rate_limit import login_failure_limit, login_ip_limit, register_ip_limit
 
-from schemas import UserCreate, User, Token, TaskCreate, Task
+from schemas import (
+    UserCreate, User, Token, TaskCreate, Task, TaskUpdate, TaskSearchResult, TaskBulkCreate, TaskBulkUpdate, TaskIds,
+    NoteCreate, NoteUpdate, Note
+)
 from crud import (
-    create_user,
-    authenticate_user,
+    acreate_user,
+    get_user,
+    aauthenticate_user,
     get_current_user,
     create_access_token,
     get_user_tasks,
+    aget_user_tasks,
+    get_user_tasks_page,
+    get_user_task,
     create_user_task,
-    delete_task
+    create_user_tasks,
+    update_user_tasks,
+    delete_user_tasks,
+    delete_task,
+    count_user_task_stats,
+    get_priority_candidates,
+    get_user_task_trends,
+    create_user_note,
+    get_user_note,
+    get_user_notes_page,
+    update_user_note,
+    delete_user_note
 )
-from tasks import sample_task
-from assistant.task_analyzer import TaskAnalyzer
+from tasks import sample_task, analyze_user_tasks, enqueue_note_categorization
+from celery_app import celery
+from assistant.task_analyzer import TaskAnalyzer, close_shared_async_client, get_shared_async_client
 
 
 Base.metadata.create_all(bind=engine)   
+# create_all skips indexes of tables that already exist
+for index in models.Task.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+ensure_search_index(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # LLM connections shared by the analysis endpoints
+    await close_shared_async_client()
 
-app = FastAPI(title="Todo App API")
+# orjson renders responses when installed (http_encoding)
+app = FastAPI(title="Todo App API", default_response_class=DefaultJSONResponse, lifespan=lifespan)
 
 load_dotenv()
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -38,32 +92,98 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "Server-Timing", "ETag"],
 )
+app.add_middleware(CacheControlMiddleware)
+app.add_middleware(CompressionMiddleware)
+# Added last so it wraps everything, CORS included
+app.add_middleware(TimingMiddleware)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_OFFSET = 1000
+# Pending tasks listed by /api/tasks/workload and days of created_per_day
+PRIORITY_TASKS_LIMIT = 5
+# Pending tasks ranked for priority_tasks: the oldest ones plus ones that
+# mention urgency keywords (see crud.get_priority_candidates), so ranking
+# costs the same for 100 or 100k tasks
+PRIORITY_MAX_CANDIDATES = int(os.getenv("PRIORITY_MAX_CANDIDATES", "300"))
+PRIORITY_KEYWORD_CANDIDATES = int(os.getenv("PRIORITY_KEYWORD_CANDIDATES", "300"))
+WORKLOAD_ACTIVITY_DAYS = 14
+MAX_TREND_DAYS = 366
+# Seconds a new /api/tasks/events socket has to send its auth message
+EVENTS_AUTH_TIMEOUT_SECONDS = 10
+
+async def load_user_tasks(db: Session, user_id: int):
+    """
+    Load a user's tasks from an async endpoint without blocking the event
+    loop: through asyncpg when DB_ASYNC_ENABLED, else in the threadpool
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as async_db:
+            return await aget_user_tasks(async_db, user_id)
+    return await run_in_threadpool(get_user_tasks, db=db, user_id=user_id)
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+def too_many_requests(retry_after: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many attempts, try again later",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
 
 # Authentication endpoints
 @app.post("/api/register", response_model=User)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    return create_user(db=db, user=user)
+async def register_user(request: Request, user: UserCreate, db: Session = Depends(get_db)):
+    if not await register_ip_limit.hit(client_ip(request)):
+        raise too_many_requests(register_ip_limit.window_seconds)
+    return await acreate_user(db=db, user=user)
 
 @app.post("/api/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    # Checked before bcrypt so rejected attempts cost no hashing
+    if not await login_ip_limit.hit(client_ip(request)):
+        raise too_many_requests(login_ip_limit.window_seconds)
+    if await login_failure_limit.exceeded(form_data.username):
+        raise too_many_requests(login_failure_limit.window_seconds)
+
+    user = await aauthenticate_user(db, form_data.username, form_data.password)
     if not user:
+        await login_failure_limit.hit(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    await login_failure_limit.reset(form_data.username)
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Protected endpoints
 @app.get("/api/me", response_model=User)
-def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+def read_users_me(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # The cached principal has no tasks, load the full user
+    return get_user(db, current_user.id)
+
+def tasks_changed(user_id: int, event: dict) -> None:
+    """
+    Push `event` (see task_events.publish_task_event) to the user's open
+    change feeds. The crud write already bumped the user's TaskCache
+    version right after its commit (TaskStats.tasks_committed).
+    """
+    publish_task_event(user_id, event, version=TaskCache.current_version(user_id))
 
 @app.post("/api/tasks", response_model=Task)
 def create_task(
@@ -73,29 +193,129 @@ def create_task(
 ):
     new_task = create_user_task(db=db, task=task, user_id=current_user.id)
     
-    # Invalidate the cached task list
-    RedisService.delete_key(f"user_tasks:{current_user.id}")
+    # Invalidate the cached task list and notify other tabs/devices
+    tasks_changed(current_user.id, {"type": "created", "tasks": [new_task.to_dict()]})
     
     return new_task
 
 @app.get("/api/tasks", response_model=List[Task])
 def get_tasks(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    title_prefix: Optional[str] = Query(None, max_length=200),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Try to get tasks from cache
-    cache_key = f"user_tasks:{current_user.id}"
-    cached_tasks = RedisService.get_key(cache_key)
-    if cached_tasks:
-        return cached_tasks
+    """
+    List the current user's tasks. Without query parameters the full list
+    is returned; with limit/cursor/completed/title_prefix a keyset page is
+    returned (newest first) and the next page's cursor is sent in the
+    X-Next-Cursor header.
 
-    # If not in cache, get from database
-    tasks = get_user_tasks(db=db, user_id=current_user.id)
-    
-    # Cache the tasks for 5 minutes
-    RedisService.set_key(cache_key, [task.to_dict() for task in tasks])
-    
-    return tasks
+    Responses carry an ETag that changes with every write to the user's
+    tasks; a matching If-None-Match gets a 304 without touching the cache
+    or the database.
+    """
+    # Read once: the ETag must never be newer than the cached body
+    version = TaskCache.current_version(current_user.id)
+    paged = any(param is not None for param in (limit, cursor, completed, title_prefix))
+    etag = task_etag(
+        current_user.id, version,
+        *(("page", limit or DEFAULT_PAGE_SIZE, cursor, completed, title_prefix) if paged else ("tasks",))
+    )
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    if paged:
+        return get_tasks_page(
+            db, current_user.id, version, etag, limit or DEFAULT_PAGE_SIZE, cursor, completed, title_prefix
+        )
+
+    # Cached for TASK_CACHE_TTL_SECONDS, rebuilt from the database on a miss.
+    # The cached JSON is sent as-is: to_dict() already matches the Task
+    # schema, so it is not parsed and re-validated on every hit.
+    cache_key = TaskCache.key(current_user.id, version=version)
+    body = TaskCache.get_or_load_raw(
+        cache_key,
+        lambda: [task.to_dict() for task in get_user_tasks(db=db, user_id=current_user.id)]
+    )
+    return cached_json_response(request, cache_key, body, headers={"ETag": etag} if etag else None)
+
+def get_tasks_page(
+    db: Session,
+    user_id: int,
+    version: Optional[int],
+    etag: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+    completed: Optional[bool],
+    title_prefix: Optional[str]
+):
+    params = json.dumps([limit, cursor, completed, title_prefix])
+    cache_key = TaskCache.key(user_id, f"page:{hashlib.sha1(params.encode()).hexdigest()}", version=version or 0)
+
+    def load_page():
+        tasks, next_cursor = get_user_tasks_page(
+            db=db,
+            user_id=user_id,
+            limit=limit,
+            cursor=cursor,
+            completed=completed,
+            title_prefix=title_prefix
+        )
+        return {"items": [task.to_dict() for task in tasks], "next_cursor": next_cursor}
+
+    try:
+        page = TaskCache.get_or_load(cache_key, load_page)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    headers = {"ETag": etag} if etag else {}
+    if page["next_cursor"]:
+        headers["X-Next-Cursor"] = page["next_cursor"]
+    # Cached to_dict() output already matches List[Task]
+    return trusted_json(page["items"], headers=headers)
+
+@app.get("/api/tasks/search", response_model=List[TaskSearchResult])
+def search_tasks(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search of the current user's tasks (title and description),
+    best matches first with their rank. The next page's offset is sent in
+    the X-Next-Offset header. Results are cached for
+    SEARCH_CACHE_TTL_SECONDS and dropped when the user's tasks change.
+    Conditional requests are answered like on GET /api/tasks.
+    """
+    version = TaskCache.current_version(current_user.id)
+    etag = task_etag(current_user.id, version, "search", q.strip(), limit, offset)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    params = json.dumps([q.strip(), limit, offset])
+    cache_key = TaskCache.key(
+        current_user.id, f"search:{hashlib.sha1(params.encode()).hexdigest()}", version=version or 0
+    )
+
+    def load_results():
+        results, has_more = search_user_tasks(db, current_user.id, q.strip(), limit=limit, offset=offset)
+        return {
+            "items": [{**task.to_dict(), "rank": rank} for task, rank in results],
+            "next_offset": offset + limit if has_more else None
+        }
+
+    page = TaskCache.get_or_load(cache_key, load_results, ttl=SEARCH_CACHE_TTL_SECONDS)
+    headers = {"ETag": etag} if etag else {}
+    if page["next_offset"] is not None:
+        headers["X-Next-Offset"] = str(page["next_offset"])
+    return trusted_json(page["items"], headers=headers)
 
 @app.delete("/api/tasks/{task_id}")
 def remove_task(
@@ -110,16 +330,233 @@ def remove_task(
             detail="Task not found"
         )
     
-    # Invalidate the cached task list
-    RedisService.delete_key(f"user_tasks:{current_user.id}")
+    # Invalidate the cached task list and notify other tabs/devices
+    tasks_changed(current_user.id, {"type": "deleted", "ids": [task_id]})
     
     return {"message": "Task successfully deleted"}
 
+@app.websocket("/api/tasks/events")
+async def task_events(websocket: WebSocket):
+    """
+    Change feed of the current user's tasks. Browsers can't send headers
+    on WebSockets and a token in the URL ends up in access logs, so the
+    client sends {"type": "auth", "token": "<access token>"} as its first
+    message, within EVENTS_AUTH_TIMEOUT_SECONDS; otherwise the socket is
+    closed with code 1008. Then sends {"type": "ready", "version": n} once
+    subscribed, and the events of task_events.publish_task_event as they
+    happen. On "ready" and "resync" clients should refetch the list; other
+    events are deltas. The socket is closed when the token expires.
+    """
+    def authenticate(token: str):
+        # Short-lived session: the socket may stay open for a long time
+        db = SessionLocal()
+        try:
+            return get_current_user(db=db, token=token)
+        finally:
+            db.close()
+
+    await websocket.accept()
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), EVENTS_AUTH_TIMEOUT_SECONDS)
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, ValueError):
+        message = None
+    token = message.get("token") if isinstance(message, dict) and message.get("type") == "auth" else None
+
+    user = None
+    if isinstance(token, str):
+        try:
+            user = await run_in_threadpool(authenticate, token)
+        except HTTPException:
+            pass
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Not authenticated")
+        return
+    expires_in = jwt.get_unverified_claims(token)["exp"] - time.time()
+
+    hub = get_task_event_hub()
+    queue = await hub.subscribe(user.id)
+
+    async def forward():
+        version = await AsyncRedisService.get_key(TaskCache.version_key(user.id)) or 0
+        try:
+            await websocket.send_text(json.dumps({"type": "ready", "version": version}))
+            while True:
+                await websocket.send_text(await queue.get())
+        except (WebSocketDisconnect, RuntimeError):
+            # Closed by the client while sending
+            return
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    workers = [asyncio.create_task(forward()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        done, _ = await asyncio.wait(workers, timeout=max(expires_in, 0), return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await hub.unsubscribe(user.id, queue)
+
+# Bulk endpoints: one transaction and one cache invalidation per request
+@app.post("/api/tasks/bulk", response_model=List[Task])
+def create_tasks_bulk(
+    payload: TaskBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    new_tasks = create_user_tasks(db=db, tasks=payload.tasks, user_id=current_user.id)
+    tasks_changed(current_user.id, {"type": "created", "tasks": new_tasks})
+    return new_tasks
+
+@app.patch("/api/tasks/bulk")
+def update_tasks_bulk(
+    payload: TaskBulkUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    values = payload.dict(exclude={"ids"}, exclude_none=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    updated = update_user_tasks(db=db, task_ids=payload.ids, user_id=current_user.id, values=values)
+    if updated:
+        tasks_changed(current_user.id, {"type": "updated", "ids": updated, "changes": values})
+    return {"updated": len(updated)}
+
+@app.post("/api/tasks/bulk/complete")
+def complete_tasks_bulk(
+    payload: TaskIds,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    updated = update_user_tasks(db=db, task_ids=payload.ids, user_id=current_user.id, values={"completed": True})
+    if updated:
+        tasks_changed(current_user.id, {"type": "updated", "ids": updated, "changes": {"completed": True}})
+    return {"updated": len(updated)}
+
+@app.post("/api/tasks/bulk/delete")
+def delete_tasks_bulk(
+    payload: TaskIds,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    deleted = delete_user_tasks(db=db, task_ids=payload.ids, user_id=current_user.id)
+    if deleted:
+        tasks_changed(current_user.id, {"type": "deleted", "ids": deleted})
+    return {"deleted": len(deleted)}
+
+# After the bulk routes, so /api/tasks/bulk isn't taken for a task id
+@app.patch("/api/tasks/{task_id}", response_model=Task)
+def update_task(
+    task_id: int,
+    payload: TaskUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    values = payload.dict(exclude_none=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    if not update_user_tasks(db=db, task_ids=[task_id], user_id=current_user.id, values=values):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    tasks_changed(current_user.id, {"type": "updated", "ids": [task_id], "changes": values})
+    return get_user_task(db, task_id=task_id, user_id=current_user.id)
+
+@app.post("/api/notes", response_model=Note)
+def create_note(
+    note: NoteCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create a note. Its AI category is filled in in the background
+    (tasks.categorize_notes); ai_category stays null until then.
+    """
+    db_note = create_user_note(db=db, note=note, user_id=current_user.id)
+    enqueue_note_categorization([db_note.id])
+    return db_note
+
+@app.get("/api/notes", response_model=List[Note])
+def get_notes(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    ai_category: Optional[models.NoteCategory] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List the current user's notes, newest first; the next page's cursor is
+    sent in the X-Next-Cursor header
+    """
+    try:
+        notes, next_cursor = get_user_notes_page(
+            db, current_user.id, limit=limit, cursor=cursor, ai_category=ai_category
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notes
+
+def get_note_or_404(db: Session, note_id: int, user_id: int) -> models.Note:
+    note = get_user_note(db, note_id=note_id, user_id=user_id)
+    if note is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
+    return note
+
+@app.get("/api/notes/{note_id}", response_model=Note)
+def get_note(note_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return get_note_or_404(db, note_id, current_user.id)
+
+@app.patch("/api/notes/{note_id}", response_model=Note)
+def update_note(
+    note_id: int,
+    note: NoteUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Update a note; a new title or content is categorized again
+    """
+    db_note = get_note_or_404(db, note_id, current_user.id)
+    if update_user_note(db, db_note, note.dict(exclude_unset=True)):
+        enqueue_note_categorization([db_note.id])
+    return db_note
+
+@app.delete("/api/notes/{note_id}")
+def remove_note(note_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    delete_user_note(db, get_note_or_404(db, note_id, current_user.id))
+    return {"message": "Note successfully deleted"}
+
 @app.get("/api/test-celery/{x}/{y}")
 async def test_celery(x: int, y: int):
     result = sample_task.delay(x, y)
     return {"task_id": result.id}
 
+@app.get("/api/db/pool")
+def get_db_pool_stats(current_user: User = Depends(get_current_user)):
+    """
+    Connection pool usage and checkout wait times, for sizing
+    DB_POOL_SIZE/DB_MAX_OVERFLOW against the uvicorn worker count
+    (authenticated like the rest of the API)
+    """
+    return get_pool_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Cache hit/miss counters and Redis latency histograms of this worker,
+    in the Prometheus text format
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/redis-test")
 async def test_redis():
     """
@@ -202,10 +639,81 @@ async def analyze_tasks(current_user: User = Depends(get_current_user), db: Sess
     """
     Analyze all tasks for the current user and provide recommendations
     """
-    tasks = get_user_tasks(db=db, user_id=current_user.id)
-    analyzer = TaskAnalyzer()
-    analysis = analyzer.batch_analyze_tasks(tasks)
-    return analysis
+    # Blocking DB work goes to the threadpool, LLM calls use the async client
+    tasks = await load_user_tasks(db, current_user.id)
+    analyzer = TaskAnalyzer(async_client=get_shared_async_client())
+    analysis = await analyzer.abatch_analyze_tasks(tasks)
+    # Plain JSON values (cached analyses), no need for jsonable_encoder
+    return trusted_json(analysis)
+
+@app.get("/api/tasks/analyze/stream")
+async def stream_task_analysis(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the analysis of all tasks: one event per task as soon as its
+    analysis finishes, then the workload summary. Sends NDJSON by default,
+    or server-sent events when the client accepts text/event-stream.
+    """
+    tasks = await load_user_tasks(db, current_user.id)
+    analyzer = TaskAnalyzer(async_client=get_shared_async_client())
+    use_sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def events():
+        async for event in analyzer.astream_batch_analysis(tasks):
+            payload = json.dumps(event)
+            if use_sse:
+                yield f"event: {event['type']}\ndata: {payload}\n\n"
+            else:
+                yield payload + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        # Keep reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/tasks/analyze/jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_analysis_job(current_user: User = Depends(get_current_user)):
+    """
+    Queue a batch analysis of the current user's tasks on the Celery worker
+    Returns:
+        dict: Job id to poll at /api/tasks/analyze/jobs/{job_id}
+    """
+    job_id = str(uuid.uuid4())
+    RedisService.set_key(
+        f"analysis_job:{job_id}",
+        {"user_id": current_user.id},
+        expire_seconds=celery.conf.result_expires
+    )
+    analyze_user_tasks.apply_async(args=[current_user.id], task_id=job_id)
+    return {"job_id": job_id, "status": "PENDING"}
+
+@app.get("/api/tasks/analyze/jobs/{job_id}")
+def get_analysis_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Get status, progress and (when finished) the result of an analysis job
+    """
+    job = RedisService.get_key(f"analysis_job:{job_id}")
+    if job is None or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+
+    result = celery.AsyncResult(job_id)
+    response = {"job_id": job_id, "status": result.state, "progress": None, "result": None}
+    if result.state == "PROGRESS":
+        response["progress"] = result.info
+    elif result.state == "SUCCESS":
+        analysis = result.result
+        total = analysis["summary"]["task_distribution"]["total_tasks"]
+        response["progress"] = {"done": total, "total": total}
+        response["result"] = analysis
+    elif result.state == "FAILURE":
+        response["error"] = str(result.info)
+    # The result went through Celery's JSON serializer already
+    return trusted_json(response)
 
 @app.get("/api/tasks/{task_id}/analyze")
 async def analyze_single_task(
@@ -216,27 +724,87 @@ async def analyze_single_task(
     """
     Analyze a specific task and provide detailed recommendations
     """
-    task = db.query(models.Task).filter(
-        models.Task.id == task_id,
-        models.Task.user_id == current_user.id
-    ).first()
+    task = await run_in_threadpool(get_user_task, db=db, task_id=task_id, user_id=current_user.id)
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    analyzer = TaskAnalyzer()
-    analysis = analyzer.analyze_task(task)
+    analyzer = TaskAnalyzer(async_client=get_shared_async_client())
+    analysis = await analyzer.aanalyze_task(task)
     return analysis
 
 @app.get("/api/tasks/workload")
-async def get_workload_analysis(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_workload_analysis(
+    request: Request,
+    exact: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """
-    Get workload analysis and task management recommendations
+    Get workload analysis and task management recommendations. Reads the
+    user's counters (TaskStats) instead of loading every task and ranks
+    pending tasks locally (no LLM call); with exact=true the counters are
+    recomputed in the database (and the cached ones corrected).
+
+    Sends an ETag of the user's task version and the day (created_per_day
+    and task ages move with the date) and answers a matching If-None-Match
+    with a 304. exact=true always recomputes and sends no ETag: corrected
+    counters may differ without a version change.
     """
-    tasks = get_user_tasks(db=db, user_id=current_user.id)
+    version = TaskCache.current_version(current_user.id)
+    etag = None
+    if exact:
+        stats = TaskStats.rebuild(current_user.id, lambda: count_user_task_stats(db, current_user.id), version=version)
+    else:
+        etag = task_etag(current_user.id, version, "workload", datetime.utcnow().date())
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        stats = TaskStats.get_or_load(
+            current_user.id, lambda: count_user_task_stats(db, current_user.id), version=version
+        )
+    distribution = TaskAnalyzer.distribution_from_counts(stats["total"], stats["completed"])
     analyzer = TaskAnalyzer()
-    workload_analysis = analyzer.get_workload_analysis(tasks)
-    return workload_analysis
+    # Ranked locally (PriorityRanker), cached until the user's tasks change
+    priority_tasks = TaskCache.get_or_load(
+        TaskCache.key(current_user.id, "priority_tasks", version=version or 0),
+        lambda: analyzer.identify_priority_tasks(
+            get_priority_candidates(
+                db,
+                current_user.id,
+                oldest=PRIORITY_MAX_CANDIDATES,
+                keyword_tiers=analyzer.ranker.urgency_tiers,
+                with_keywords=PRIORITY_KEYWORD_CANDIDATES
+            ),
+            limit=PRIORITY_TASKS_LIMIT
+        )
+    )
+    workload_analysis = analyzer.workload_from_distribution(distribution, priority_tasks)
+    workload_analysis["distribution"] = distribution
+    workload_analysis["created_per_day"] = TaskStats.recent_days(stats, WORKLOAD_ACTIVITY_DAYS)
+    return trusted_json(workload_analysis, headers={"ETag": etag} if etag else None)
+
+@app.get("/api/tasks/trends")
+def get_task_trends(
+    request: Request,
+    days: int = Query(30, ge=1, le=MAX_TREND_DAYS),
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Tasks created per day/week/month over the last `days` days with how
+    many of them are completed. Aggregated in the database and cached
+    until the user's tasks change; the ETag also changes with the day.
+    """
+    version = TaskCache.current_version(current_user.id)
+    etag = task_etag(current_user.id, version, "trends", bucket, days, datetime.utcnow().date())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    trends = TaskCache.get_or_load(
+        TaskCache.key(current_user.id, f"trends:{bucket}:{days}", version=version or 0),
+        lambda: get_user_task_trends(db, current_user.id, days, bucket)
+    )
+    return trusted_json(trends, headers={"ETag": etag} if etag else None)
 
 if __name__ == "__main__":
     import uvicorn
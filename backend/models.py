@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -67,6 +67,13 @@ class Task(Base):
 
     owner = relationship("User", back_populates="tasks")
 
+    __table_args__ = (
+        # Keyset pagination of a user's tasks, newest first, with and
+        # without the completed filter
+        Index("ix_tasks_user_completed_created_id", "user_id", "completed", "created_at", "id"),
+        Index("ix_tasks_user_created_id", "user_id", "created_at", "id"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
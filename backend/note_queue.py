@@ -0,0 +1,76 @@
+import os
+from typing import List, Optional
+
+from redis_app import RedisService
+
+# Notes created within this window share a categorization batch
+NOTE_BATCH_WINDOW_SECONDS = float(os.getenv("NOTE_BATCH_WINDOW_SECONDS", "2"))
+# Upper bound on one drain; it is released early when the queue empties
+NOTE_DRAIN_LOCK_TTL_MS = int(os.getenv("NOTE_DRAIN_LOCK_TTL_MS", str(5 * 60 * 1000)))
+# Failed categorizations of a content after which the sweep stops queueing it
+NOTE_MAX_ATTEMPTS = int(os.getenv("NOTE_MAX_ATTEMPTS", "3"))
+# Failures are forgotten this long after the first one, so the content is
+# tried again (the model or its availability may have changed by then)
+NOTE_FAILURE_TTL_SECONDS = int(os.getenv("NOTE_FAILURE_TTL_SECONDS", str(24 * 3600)))
+
+NOTE_QUEUE_KEY = "note_categorize:queue"
+NOTE_DRAIN_LOCK_KEY = "note_categorize:drain"
+NOTE_FAILURES_PREFIX = "note_categorize:failures:"
+
+
+class NoteQueue:
+    """
+    Ids of notes waiting for AI categorization, in the Redis list
+    note_categorize:queue.
+
+    At most one drain (tasks.categorize_notes) is scheduled or running at a
+    time: whoever takes the note_categorize:drain lock schedules it and the
+    drain releases it. Writers only RPUSH, so creating a note never waits
+    for a model call, and notes created while a drain is pending are picked
+    up by that drain.
+
+    Failed categorizations are counted per note content hash (editing a
+    note starts over); requeue_uncategorized_notes skips contents that
+    failed NOTE_MAX_ATTEMPTS times.
+    """
+
+    @staticmethod
+    def push(note_ids: List[int]) -> bool:
+        return bool(note_ids) and RedisService.push_list(NOTE_QUEUE_KEY, note_ids) is not None
+
+    @staticmethod
+    def pop(count: int) -> List[int]:
+        return RedisService.pop_list(NOTE_QUEUE_KEY, count)
+
+    @staticmethod
+    def length() -> int:
+        return RedisService.list_length(NOTE_QUEUE_KEY)
+
+    @staticmethod
+    def claim_drain() -> Optional[str]:
+        """
+        :return: Token for release_drain if no drain is pending, else None
+        """
+        return RedisService.acquire_lock(NOTE_DRAIN_LOCK_KEY, NOTE_DRAIN_LOCK_TTL_MS)
+
+    @staticmethod
+    def release_drain(token: str) -> None:
+        RedisService.release_lock(NOTE_DRAIN_LOCK_KEY, token)
+
+    @staticmethod
+    def record_failures(content_hashes: List[str]) -> List[Optional[int]]:
+        """
+        :return: Failures so far per content hash (None on Redis errors)
+        """
+        return [
+            RedisService.incr_window(NOTE_FAILURES_PREFIX + content_hash, NOTE_FAILURE_TTL_SECONDS)
+            for content_hash in content_hashes
+        ]
+
+    @staticmethod
+    def given_up(content_hashes: List[str]) -> List[bool]:
+        """
+        :return: Per content hash, whether it failed NOTE_MAX_ATTEMPTS times
+        """
+        failures = RedisService.get_many([NOTE_FAILURES_PREFIX + content_hash for content_hash in content_hashes])
+        return [count is not None and int(count) >= NOTE_MAX_ATTEMPTS for count in failures]
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from profiling import span
+
+# bcrypt cost factor (2^rounds iterations); each +1 doubles the time per hash.
+# Existing hashes with another cost are upgraded on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so threads hash in parallel up to the core count
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes queued or running before new ones are rejected instead of queued
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 16)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when PASSWORD_HASH_MAX_PENDING hashes are already queued
+    """
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated, bounded thread pool so logins and sign-ups
+    neither block the event loop nor take over the threadpool shared with
+    sync endpoints. Past max_pending queued hashes, calls fail fast with
+    PasswordHasherBusy rather than piling up latency.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHasherBusy()
+            self._pending += 1
+
+    def _release(self, _=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, fn, *args):
+        self._reserve()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        with span("bcrypt"):
+            return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured cost
+        """
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against its hash
+        :param hashed_password: Stored hash, or None for an unknown user: a
+                                dummy hash is checked so the response time
+                                doesn't reveal whether the account exists
+        :return: (valid, new_hash); new_hash is set when the stored hash
+                 uses an outdated cost and should be replaced
+        """
+        if hashed_password is None:
+            await self._run(pwd_context.dummy_verify)
+            return False, None
+        return await self._run(pwd_context.verify_and_update, password, hashed_password)
+
+
+password_hasher = PasswordHasher()
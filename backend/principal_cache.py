@@ -0,0 +1,55 @@
+import os
+from typing import Optional
+
+from lru import LRUCache
+from redis_app import RedisService
+import schemas
+
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+# The in-process tier can't be invalidated from other workers, so it keeps
+# entries for a shorter time than Redis
+PRINCIPAL_LOCAL_TTL_SECONDS = int(os.getenv("PRINCIPAL_LOCAL_TTL_SECONDS", "10"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+_local = LRUCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_LOCAL_TTL_SECONDS, name="principal")
+
+
+class PrincipalCache:
+    """
+    Short-TTL cache of authenticated users keyed by the token subject
+    (email), in front of the per-request user lookup
+    """
+
+    @staticmethod
+    def key(email: str) -> str:
+        return f"principal:{email}"
+
+    @staticmethod
+    def get(email: str) -> Optional[schemas.Principal]:
+        key = PrincipalCache.key(email)
+        principal = _local.get(key)
+        if principal is not None:
+            return principal
+
+        cached = RedisService.get_key(key)
+        if cached is None:
+            return None
+        principal = schemas.Principal(**cached)
+        _local.set(key, principal)
+        return principal
+
+    @staticmethod
+    def set(principal: schemas.Principal) -> None:
+        key = PrincipalCache.key(principal.email)
+        _local.set(key, principal)
+        RedisService.set_key(key, principal.model_dump(), expire_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def invalidate(email: str) -> None:
+        """
+        Drop a cached principal (this process and Redis). Other workers'
+        in-process entries expire within PRINCIPAL_LOCAL_TTL_SECONDS.
+        """
+        key = PrincipalCache.key(email)
+        _local.delete(key)
+        RedisService.delete_key(key)
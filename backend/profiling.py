@@ -0,0 +1,201 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import registry
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    PyinstrumentProfiler = None
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+# Profile 1 in N requests (0 = off)
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+# Let clients ask for a profile with an "X-Profile: 1" header; keep it off
+# in production, profiling slows the request down a lot
+PROFILE_HEADER_ENABLED = os.getenv("PROFILE_HEADER_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_HEADER = b"x-profile"
+
+# Span name -> [seconds, count] for the request being served. The dict is
+# created per request and shared (not copied) with threadpool calls and
+# asyncio tasks started by the request, so their spans add up here too.
+_spans: contextvars.ContextVar[Optional[Dict[str, list]]] = contextvars.ContextVar("spans", default=None)
+_spans_lock = threading.Lock()
+# One profile at a time: profilers are process-wide
+_profile_lock = threading.Lock()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    ("method", "route", "status")
+)
+http_request_span_duration = registry.histogram(
+    "http_request_span_seconds",
+    "Time spent per request in DB, Redis, LLM, auth ... calls, by route",
+    ("route", "span")
+)
+
+
+def record_span(name: str, seconds: float) -> None:
+    """
+    Add time spent in `name` (db, redis, llm, ...) to the current request,
+    no-op outside of a request
+    """
+    spans = _spans.get()
+    if spans is None:
+        return
+    with _spans_lock:
+        span = spans.get(name)
+        if span is None:
+            spans[name] = [seconds, 1]
+        else:
+            span[0] += seconds
+            span[1] += 1
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a block as a span of the current request
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_span("db", time.perf_counter() - conn.info["query_start"].pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    if context.connection is not None and context.connection.info.get("query_start"):
+        record_span("db", time.perf_counter() - context.connection.info["query_start"].pop())
+
+
+def server_timing_header(spans: Dict[str, list], total: float) -> bytes:
+    """
+    Server-Timing value: one entry per span plus "app" (everything else,
+    e.g. validation and serialization) and "total"
+    """
+    entries = []
+    accounted = 0.0
+    for name, (seconds, count) in sorted(spans.items()):
+        accounted += seconds
+        entries.append(f'{name};dur={seconds * 1000:.2f};desc="{count}x"')
+    # Concurrent spans (e.g. parallel LLM calls) can add up to more than the
+    # wall time, so "app" is clamped at 0
+    entries.append(f"app;dur={max(total - accounted, 0.0) * 1000:.2f}")
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries).encode("latin-1")
+
+
+class _RequestProfiler:
+    """
+    pyinstrument when installed (async-aware, saved as speedscope JSON),
+    else cProfile (saved as .prof for snakeviz/flameprof; only sees code on
+    the event loop thread, not sync endpoints in the threadpool)
+    """
+
+    def __init__(self):
+        if PyinstrumentProfiler is not None:
+            self._profiler = PyinstrumentProfiler(async_mode="enabled")
+        else:
+            import cProfile
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if PyinstrumentProfiler is not None:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop_and_save(self, route: str) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        name = f"{int(time.time())}-{route.strip('/').replace('/', '_') or 'root'}-{uuid.uuid4().hex[:8]}"
+        if PyinstrumentProfiler is not None:
+            self._profiler.stop()
+            path = os.path.join(PROFILE_DIR, name + ".speedscope.json")
+            with open(path, "w") as f:
+                f.write(self._profiler.output(renderer=SpeedscopeRenderer()))
+        else:
+            self._profiler.disable()
+            path = os.path.join(PROFILE_DIR, name + ".prof")
+            self._profiler.dump_stats(path)
+        return path
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware: per-route latency and span breakdown metrics, a
+    Server-Timing response header, and opt-in sampled profiling
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._counter = itertools.count(1)
+
+    def _should_profile(self, scope) -> bool:
+        if PROFILE_SAMPLE_EVERY and next(self._counter) % PROFILE_SAMPLE_EVERY == 0:
+            return True
+        if PROFILE_HEADER_ENABLED:
+            return dict(scope["headers"]).get(PROFILE_HEADER) == b"1"
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans = {}
+        token = _spans.set(spans)
+        start = time.perf_counter()
+        status_code = 500
+        profiler = None
+        if self._should_profile(scope) and _profile_lock.acquire(blocking=False):
+            profiler = _RequestProfiler()
+            profiler.start()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing_header(spans, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            _spans.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            if profiler is not None:
+                try:
+                    profiler.stop_and_save(route)
+                finally:
+                    _profile_lock.release()
+            http_request_duration.observe(elapsed, scope["method"], route, str(status_code))
+            for name, (seconds, _) in spans.items():
+                http_request_span_duration.observe(seconds, route, name)
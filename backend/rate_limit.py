@@ -0,0 +1,53 @@
+import os
+
+from redis_app import AsyncRedisService
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+# Login attempts per client IP per window
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "20"))
+# Failed logins per account per window (reset by a successful login)
+LOGIN_RATE_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", "5"))
+REGISTER_RATE_LIMIT_PER_IP = int(os.getenv("REGISTER_RATE_LIMIT_PER_IP", "10"))
+
+
+class RateLimit:
+    """
+    Fixed-window counter in Redis. Fails open: when Redis is unavailable
+    requests are allowed rather than locking everyone out.
+    """
+
+    def __init__(self, name: str, limit: int, window_seconds: int = RATE_LIMIT_WINDOW_SECONDS):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    def key(self, identifier: str) -> str:
+        return f"rate:{self.name}:{identifier}"
+
+    async def hit(self, identifier: str) -> bool:
+        """
+        Count one event
+        :return: False if the limit was already reached in this window
+        """
+        if not RATE_LIMIT_ENABLED:
+            return True
+        count = await AsyncRedisService.incr_window(self.key(identifier), self.window_seconds)
+        return count is None or count <= self.limit
+
+    async def exceeded(self, identifier: str) -> bool:
+        """
+        Check the limit without counting an event
+        """
+        if not RATE_LIMIT_ENABLED:
+            return False
+        count = await AsyncRedisService.get_key(self.key(identifier))
+        return count is not None and count >= self.limit
+
+    async def reset(self, identifier: str) -> None:
+        await AsyncRedisService.delete_key(self.key(identifier))
+
+
+login_ip_limit = RateLimit("login_ip", LOGIN_RATE_LIMIT_PER_IP)
+login_failure_limit = RateLimit("login_failures", LOGIN_RATE_LIMIT_PER_EMAIL)
+register_ip_limit = RateLimit("register_ip", REGISTER_RATE_LIMIT_PER_IP)
@@ -1,34 +1,193 @@
 import redis
-from typing import Optional
+import redis.asyncio
+from typing import Dict, Iterable, Iterator, List, Optional
+import asyncio
 import json
+import logging
+import os
+import random
+import time
+import uuid
+import weakref
+import cache_codec
+from metrics import cache_requests, registry
+from profiling import record_span
+
+logger = logging.getLogger(__name__)
 
 # Redis connection configuration
-redis_client = redis.Redis(
-    host='redis',  # This matches the service name in docker-compose
-    port=6379,
-    db=0, 
-    decode_responses=True  # Automatically decode responses to Python strings
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")  # This matches the service name in docker-compose
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# Seconds to wait for a free pooled connection before giving up
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "2"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", "2"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+# Fraction of successful commands logged at DEBUG (errors are always logged)
+REDIS_LOG_SAMPLE_RATE = float(os.getenv("REDIS_LOG_SAMPLE_RATE", "0.01"))
+
+_connection_options = dict(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    # Values are bytes produced by cache_codec (possibly compressed)
+    decode_responses=False
 )
 
+# Blocking pool: under load requests wait briefly for a connection instead
+# of failing as soon as max_connections are in use
+redis_pool = redis.BlockingConnectionPool(**_connection_options)
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+# asyncio connections belong to the event loop that opened them, so every
+# loop (the uvicorn loop, each asyncio.run in Celery tasks) gets its own client
+_async_clients = weakref.WeakKeyDictionary()
+
+def _make_async_client():
+    return redis.asyncio.Redis(
+        connection_pool=redis.asyncio.BlockingConnectionPool(**_connection_options)
+    )
+
+def make_pubsub_client():
+    """
+    Dedicated asyncio client for a long-lived pub/sub connection: it is
+    kept out of the shared pool and has no read timeout, since a
+    subscriber waits for messages indefinitely
+    """
+    options = {
+        key: value for key, value in _connection_options.items() if key not in ("max_connections", "timeout")
+    }
+    return redis.asyncio.Redis(**{**options, "socket_timeout": None})
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = _make_async_client()
+    return client
+
+async def close_async_client() -> None:
+    """
+    Close the running loop's client and its pool. Code that runs a loop of
+    its own (asyncio.run in a Celery task) calls it before the loop ends,
+    else the connections are left open on a dead loop.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+        # The pool was passed in, so the client doesn't own and close it
+        await client.connection_pool.disconnect()
+
+# Compare-and-delete so a lock that expired and was re-taken by another
+# worker is not released by the previous holder
+_release_lock_script = redis_client.register_script("""
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+""")
+
+# INCR a fixed-window counter and give it the window as TTL when it has
+# none. One atomic step: with SET NX EX + INCR the key could expire in
+# between and INCR would recreate it without a TTL (a lockout forever).
+# Checking TTL rather than count == 1 also repairs keys left without one.
+INCR_WINDOW_SCRIPT = """
+local count = redis.call("incr", KEYS[1])
+if redis.call("ttl", KEYS[1]) == -1 then
+    redis.call("expire", KEYS[1], ARGV[1])
+end
+return count
+"""
+_incr_window_script = redis_client.register_script(INCR_WINDOW_SCRIPT)
+
+# HINCRBY several fields, only if the hash exists: counters are never
+# started from zero on a partial hash (a missing hash is rebuilt instead)
+_hincrby_if_exists_script = redis_client.register_script("""
+if redis.call("exists", KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call("hincrby", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+""")
+
+redis_command_duration = registry.histogram(
+    "redis_command_duration_seconds",
+    "Latency of RedisService/AsyncRedisService commands by key prefix",
+    ("command", "prefix")
+)
+redis_errors = registry.counter(
+    "redis_errors_total",
+    "Failed Redis commands by key prefix",
+    ("command", "prefix")
+)
+
+
+def key_prefix(key: str) -> str:
+    """
+    Metrics label for a key: the part before the first ":" ("user_tasks",
+    "analysis", "principal", ...). Keys are never logged in full since some
+    embed user data (e.g. emails).
+    """
+    prefix, separator, _ = key.partition(":")
+    return prefix if separator else "other"
+
+
+def _observe(command: str, key: str, start: float, hits: Optional[int] = None, lookups: int = 1) -> None:
+    """
+    Record a successful command
+    :param hits: For reads, how many of `lookups` keys were found
+    """
+    elapsed = time.perf_counter() - start
+    prefix = key_prefix(key)
+    redis_command_duration.observe(elapsed, command, prefix)
+    record_span("redis", elapsed)
+    if hits is not None:
+        if hits:
+            cache_requests.inc("redis", prefix, "hit", amount=hits)
+        if lookups - hits:
+            cache_requests.inc("redis", prefix, "miss", amount=lookups - hits)
+    if REDIS_LOG_SAMPLE_RATE and random.random() < REDIS_LOG_SAMPLE_RATE:
+        logger.debug(
+            "redis command=%s prefix=%s keys=%d hits=%s duration_ms=%.3f",
+            command, prefix, lookups, hits, elapsed * 1000
+        )
+
+
+def _error(command: str, key: str, start: float, error: Exception) -> None:
+    record_span("redis", time.perf_counter() - start)
+    prefix = key_prefix(key)
+    redis_errors.inc(command, prefix)
+    logger.warning("redis error command=%s prefix=%s error=%r", command, prefix, error)
+
+
 class RedisService:
     @staticmethod
     def set_key(key: str, value: any, expire_seconds: Optional[int] = None) -> bool:
         """
         Set a key-value pair in Redis
         :param key: Key to set
-        :param value: Value to set (will be JSON encoded)
+        :param value: Value to set (encoded with cache_codec)
         :param expire_seconds: Optional expiration time in seconds
         :return: True if successful
         """
+        start = time.perf_counter()
         try:
-            serialized_value = json.dumps(value)
-            redis_client.set(key, serialized_value)
-            if expire_seconds:
-                redis_client.expire(key, expire_seconds)
-            print(f"Redis key set: {key}")
+            serialized_value = cache_codec.encode(value)
+            # SET with EX: value and expiry in one atomic round-trip
+            redis_client.set(key, serialized_value, ex=expire_seconds or None)
+            _observe("set", key, start)
             return True
         except Exception as e:
-            print(f"Error setting Redis key: {e}")
+            _error("set", key, start, e)
             return False
 
     @staticmethod
@@ -38,16 +197,47 @@ class RedisService:
         :param key: Key to retrieve
         :return: Deserialized value or None if not found
         """
+        start = time.perf_counter()
         try:
             value = redis_client.get(key)
-            if value:
-                return json.loads(value)
-            print(f"Redis key not found: {key}")
+            _observe("get", key, start, hits=int(value is not None))
+            return cache_codec.decode(value)
+        except Exception as e:
+            _error("get", key, start, e)
             return None
+
+    @staticmethod
+    def get_raw_json(key: str) -> Optional[bytes]:
+        """
+        Get a value as a JSON document without deserializing it, e.g. to
+        send a cached payload as the response body
+        :param key: Key to retrieve
+        :return: JSON bytes or None if not found
+        """
+        start = time.perf_counter()
+        try:
+            value = redis_client.get(key)
+            _observe("get", key, start, hits=int(value is not None))
+            return cache_codec.decode_to_json_bytes(value)
         except Exception as e:
-            print(f"Error getting Redis key: {e}")
+            _error("get", key, start, e)
             return None
 
+    @staticmethod
+    def set_raw_json(key: str, data: bytes, expire_seconds: Optional[int] = None) -> bool:
+        """
+        Store an already serialized JSON document
+        :param data: JSON bytes (see cache_codec.dumps_json)
+        """
+        start = time.perf_counter()
+        try:
+            redis_client.set(key, cache_codec.encode_json_bytes(data), ex=expire_seconds or None)
+            _observe("set", key, start)
+            return True
+        except Exception as e:
+            _error("set", key, start, e)
+            return False
+
     @staticmethod
     def delete_key(key: str) -> bool:
         """
@@ -55,12 +245,237 @@ class RedisService:
         :param key: Key to delete
         :return: True if successful
         """
+        start = time.perf_counter()
+        try:
+            deleted = bool(redis_client.delete(key))
+            _observe("delete", key, start)
+            return deleted
+        except Exception as e:
+            _error("delete", key, start, e)
+            return False
+
+    @staticmethod
+    def get_many(keys: List[str]) -> List[Optional[any]]:
+        """
+        Get many keys in one round-trip (MGET)
+        :param keys: Keys to retrieve (metrics use the first key's prefix)
+        :return: Deserialized values in the order of `keys`, None for misses
+        """
+        if not keys:
+            return []
+        start = time.perf_counter()
+        try:
+            values = redis_client.mget(keys)
+            _observe("mget", keys[0], start, hits=sum(v is not None for v in values), lookups=len(keys))
+            return [cache_codec.decode(value) for value in values]
+        except Exception as e:
+            _error("mget", keys[0], start, e)
+            return [None] * len(keys)
+
+    @staticmethod
+    def set_many(mapping: Dict[str, any], expire_seconds: Optional[int] = None) -> bool:
+        """
+        Set many key-value pairs in one round-trip
+        :param mapping: Keys and values (values encoded with cache_codec)
+        :param expire_seconds: Optional expiration time in seconds for every key
+        :return: True if successful
+        """
+        if not mapping:
+            return True
+        first_key = next(iter(mapping))
+        start = time.perf_counter()
+        try:
+            serialized = {key: cache_codec.encode(value) for key, value in mapping.items()}
+            if expire_seconds:
+                pipeline = redis_client.pipeline(transaction=False)
+                for key, value in serialized.items():
+                    pipeline.set(key, value, ex=expire_seconds)
+                pipeline.execute()
+            else:
+                redis_client.mset(serialized)
+            _observe("mset", first_key, start, lookups=len(mapping))
+            return True
+        except Exception as e:
+            _error("mset", first_key, start, e)
+            return False
+
+    @staticmethod
+    def delete_many(keys: Iterable[str]) -> int:
+        """
+        Delete many keys in one round-trip
+        :return: Number of deleted keys
+        """
+        keys = list(keys)
+        if not keys:
+            return 0
+        start = time.perf_counter()
+        try:
+            deleted = redis_client.delete(*keys)
+            _observe("delete", keys[0], start, lookups=len(keys))
+            return deleted
+        except Exception as e:
+            _error("delete", keys[0], start, e)
+            return 0
+
+    @staticmethod
+    def incr(key: str, initial: Optional[int] = None) -> Optional[int]:
+        """
+        Atomically increment an integer key
+        :param key: Key to increment
+        :param initial: Value a missing key starts from (default 0)
+        :return: New value, or None on error
+        """
+        start = time.perf_counter()
+        try:
+            if initial is None:
+                value = redis_client.incr(key)
+            else:
+                pipeline = redis_client.pipeline(transaction=False)
+                pipeline.set(key, initial, nx=True)
+                pipeline.incr(key)
+                value = pipeline.execute()[1]
+            _observe("incr", key, start)
+            return value
+        except Exception as e:
+            _error("incr", key, start, e)
+            return None
+
+    @staticmethod
+    def get_counter(key: str, initial: int) -> Optional[int]:
+        """
+        Read an integer key, creating it as `initial` when missing
+        (one round-trip)
+        :return: Current value, or None on error
+        """
+        start = time.perf_counter()
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            pipeline.set(key, initial, nx=True)
+            pipeline.get(key)
+            created, value = pipeline.execute()
+            _observe("get", key, start, hits=int(not created))
+            return int(value)
+        except Exception as e:
+            _error("get", key, start, e)
+            return None
+
+    @staticmethod
+    def incr_window(key: str, window_seconds: int) -> Optional[int]:
+        """
+        Count an event in a fixed time window: the key is incremented and
+        given the window as its TTL in one atomic script (one round-trip)
+        :return: Count within the current window, or None on error
+        """
+        start = time.perf_counter()
+        try:
+            count = _incr_window_script(keys=[key], args=[window_seconds], client=redis_client)
+            _observe("incr", key, start)
+            return count
+        except Exception as e:
+            _error("incr", key, start, e)
+            return None
+
+    @staticmethod
+    def get_hash(key: str) -> Optional[Dict[str, str]]:
+        """
+        Get all fields of a hash
+        :return: {field: value} as strings, or None if the hash doesn't exist
+        """
+        start = time.perf_counter()
+        try:
+            values = redis_client.hgetall(key)
+            _observe("hgetall", key, start, hits=int(bool(values)))
+            if not values:
+                return None
+            return {field.decode("utf-8"): value.decode("utf-8") for field, value in values.items()}
+        except Exception as e:
+            _error("hgetall", key, start, e)
+            return None
+
+    @staticmethod
+    def set_hash(key: str, mapping: Dict[str, any], expire_seconds: Optional[int] = None) -> bool:
+        """
+        Replace a hash with `mapping` atomically (MULTI/EXEC)
+        """
+        start = time.perf_counter()
+        try:
+            pipeline = redis_client.pipeline(transaction=True)
+            pipeline.delete(key)
+            pipeline.hset(key, mapping=mapping)
+            if expire_seconds:
+                pipeline.expire(key, expire_seconds)
+            pipeline.execute()
+            _observe("hset", key, start)
+            return True
+        except Exception as e:
+            _error("hset", key, start, e)
+            return False
+
+    @staticmethod
+    def hincrby_if_exists(key: str, deltas: Dict[str, int]) -> bool:
+        """
+        Atomically add `deltas` to the fields of an existing hash
+        :return: True if the hash existed and was updated
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return True
+        start = time.perf_counter()
         try:
-            print(f"Redis key deleted: {key}")
-            return bool(redis_client.delete(key))
-        
+            args = [item for pair in deltas.items() for item in pair]
+            updated = bool(_hincrby_if_exists_script(keys=[key], args=args, client=redis_client))
+            _observe("hincrby", key, start)
+            return updated
         except Exception as e:
-            print(f"Error deleting Redis key: {e}")
+            _error("hincrby", key, start, e)
+            return False
+
+    @staticmethod
+    def scan_keys(pattern: str) -> Iterator[str]:
+        """
+        Iterate over keys matching `pattern` with SCAN (doesn't block Redis
+        like KEYS); stops silently on errors
+        """
+        start = time.perf_counter()
+        try:
+            for key in redis_client.scan_iter(match=pattern, count=1000):
+                yield key.decode("utf-8")
+            _observe("scan", pattern, start)
+        except Exception as e:
+            _error("scan", pattern, start, e)
+
+    @staticmethod
+    def acquire_lock(key: str, ttl_ms: int) -> Optional[str]:
+        """
+        Try to take a short-lived lock (SET NX PX)
+        :param key: Lock key
+        :param ttl_ms: Lock expiry in milliseconds, in case the holder dies
+        :return: Token to pass to release_lock, or None if the lock is taken.
+                 Fails open on Redis errors (returns a token) so callers
+                 don't wait on a lock nobody can take.
+        """
+        token = uuid.uuid4().hex
+        start = time.perf_counter()
+        try:
+            acquired = redis_client.set(key, token, nx=True, px=ttl_ms)
+            _observe("lock", key, start)
+            return token if acquired else None
+        except Exception as e:
+            _error("lock", key, start, e)
+            return token
+
+    @staticmethod
+    def release_lock(key: str, token: str) -> bool:
+        """
+        Release a lock taken with acquire_lock, only if we still hold it
+        """
+        start = time.perf_counter()
+        try:
+            released = bool(_release_lock_script(keys=[key], args=[token], client=redis_client))
+            _observe("unlock", key, start)
+            return released
+        except Exception as e:
+            _error("unlock", key, start, e)
             return False
 
     @staticmethod
@@ -71,16 +486,17 @@ class RedisService:
         :param values: List of values to store
         :return: True if successful
         """
+        start = time.perf_counter()
         try:
             pipeline = redis_client.pipeline()
             pipeline.delete(key)
             if values:
                 pipeline.rpush(key, *[json.dumps(v) for v in values])
             pipeline.execute()
-            print(f"Redis list set: {key}")
+            _observe("set_list", key, start)
             return True
         except Exception as e:
-            print(f"Error setting Redis list: {e}")
+            _error("set_list", key, start, e)
             return False
 
     @staticmethod
@@ -90,14 +506,171 @@ class RedisService:
         :param key: Key of the list to retrieve
         :return: List of deserialized values
         """
+        start = time.perf_counter()
         try:
             values = redis_client.lrange(key, 0, -1)
-            print(values)
+            _observe("get_list", key, start, hits=int(bool(values)))
+            return [json.loads(v) for v in values]
+        except Exception as e:
+            _error("get_list", key, start, e)
+            return []
+
+    @staticmethod
+    def push_list(key: str, values: list) -> Optional[int]:
+        """
+        Append JSON-encoded values to a list (RPUSH)
+        :return: Length of the list, or None on error
+        """
+        start = time.perf_counter()
+        try:
+            length = redis_client.rpush(key, *[json.dumps(v) for v in values])
+            _observe("rpush", key, start)
+            return length
+        except Exception as e:
+            _error("rpush", key, start, e)
+            return None
+
+    @staticmethod
+    def pop_list(key: str, count: int) -> list:
+        """
+        Remove and return up to `count` values from the head of a list
+        (LPOP with a count, Redis >= 6.2)
+        :return: Deserialized values, [] when empty or on error
+        """
+        start = time.perf_counter()
+        try:
+            values = redis_client.lpop(key, count) or []
+            _observe("lpop", key, start, hits=int(bool(values)))
             return [json.loads(v) for v in values]
         except Exception as e:
-            print(f"Error getting Redis list: {e}")
+            _error("lpop", key, start, e)
             return []
 
+    @staticmethod
+    def list_length(key: str) -> int:
+        start = time.perf_counter()
+        try:
+            length = redis_client.llen(key)
+            _observe("llen", key, start)
+            return length
+        except Exception as e:
+            _error("llen", key, start, e)
+            return 0
+
+    @staticmethod
+    def publish(channel: str, message: dict) -> Optional[int]:
+        """
+        Publish a JSON message on a pub/sub channel
+        :return: Number of subscribers that received it, or None on error
+        """
+        start = time.perf_counter()
+        try:
+            receivers = redis_client.publish(channel, json.dumps(message))
+            _observe("publish", channel, start)
+            return receivers
+        except Exception as e:
+            _error("publish", channel, start, e)
+            return None
+
+class AsyncRedisService:
+    """
+    asyncio counterpart of RedisService for `async def` endpoints, so
+    cache calls don't block the event loop
+    """
+
+    @staticmethod
+    async def set_key(key: str, value: any, expire_seconds: Optional[int] = None) -> bool:
+        start = time.perf_counter()
+        try:
+            await get_async_client().set(key, cache_codec.encode(value), ex=expire_seconds or None)
+            _observe("set", key, start)
+            return True
+        except Exception as e:
+            _error("set", key, start, e)
+            return False
+
+    @staticmethod
+    async def get_key(key: str) -> Optional[any]:
+        start = time.perf_counter()
+        try:
+            value = await get_async_client().get(key)
+            _observe("get", key, start, hits=int(value is not None))
+            return cache_codec.decode(value)
+        except Exception as e:
+            _error("get", key, start, e)
+            return None
+
+    @staticmethod
+    async def delete_key(key: str) -> bool:
+        start = time.perf_counter()
+        try:
+            deleted = bool(await get_async_client().delete(key))
+            _observe("delete", key, start)
+            return deleted
+        except Exception as e:
+            _error("delete", key, start, e)
+            return False
+
+    @staticmethod
+    async def incr_window(key: str, window_seconds: int) -> Optional[int]:
+        start = time.perf_counter()
+        try:
+            count = await get_async_client().register_script(INCR_WINDOW_SCRIPT)(keys=[key], args=[window_seconds])
+            _observe("incr", key, start)
+            return count
+        except Exception as e:
+            _error("incr", key, start, e)
+            return None
+
+    @staticmethod
+    async def get_many(keys: List[str]) -> List[Optional[any]]:
+        if not keys:
+            return []
+        start = time.perf_counter()
+        try:
+            values = await get_async_client().mget(keys)
+            _observe("mget", keys[0], start, hits=sum(v is not None for v in values), lookups=len(keys))
+            return [cache_codec.decode(value) for value in values]
+        except Exception as e:
+            _error("mget", keys[0], start, e)
+            return [None] * len(keys)
+
+    @staticmethod
+    async def set_many(mapping: Dict[str, any], expire_seconds: Optional[int] = None) -> bool:
+        if not mapping:
+            return True
+        first_key = next(iter(mapping))
+        start = time.perf_counter()
+        try:
+            client = get_async_client()
+            serialized = {key: cache_codec.encode(value) for key, value in mapping.items()}
+            if expire_seconds:
+                pipeline = client.pipeline(transaction=False)
+                for key, value in serialized.items():
+                    pipeline.set(key, value, ex=expire_seconds)
+                await pipeline.execute()
+            else:
+                await client.mset(serialized)
+            _observe("mset", first_key, start, lookups=len(mapping))
+            return True
+        except Exception as e:
+            _error("mset", first_key, start, e)
+            return False
+
+    @staticmethod
+    async def delete_many(keys: Iterable[str]) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        start = time.perf_counter()
+        try:
+            deleted = await get_async_client().delete(*keys)
+            _observe("delete", keys[0], start, lookups=len(keys))
+            return deleted
+        except Exception as e:
+            _error("delete", keys[0], start, e)
+            return 0
+
 # Example usage in your FastAPI endpoints:
 """
 from .redis import RedisService
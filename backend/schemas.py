@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 
+from models import NoteCategory
+
 class TaskBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -18,6 +20,59 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskSearchResult(Task):
+    rank: float
+
+# Upper bound on items per bulk request
+MAX_BULK_ITEMS = 1000
+
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class TaskIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS)
+
+class TaskUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+
+class TaskBulkUpdate(TaskUpdate, TaskIds):
+    pass
+
+class NoteBase(BaseModel):
+    title: str
+    content: Optional[str] = None
+    category: Optional[str] = None
+
+class NoteCreate(NoteBase):
+    pass
+
+class NoteUpdate(BaseModel):
+    title: Optional[str] = None
+    content: Optional[str] = None
+    category: Optional[str] = None
+
+    @field_validator("title")
+    @classmethod
+    def title_not_null(cls, title: Optional[str]) -> str:
+        # Left out means unchanged; content and category may be cleared
+        # with null, the title may not
+        if title is None:
+            raise ValueError("title may not be null")
+        return title
+
+class Note(NoteBase):
+    id: int
+    # Filled in asynchronously after creation (None until then)
+    ai_category: Optional[NoteCategory] = None
+    ai_explanation: Optional[str] = None
+    created_at: datetime
+    user_id: int
+
+    class Config:
+        from_attributes = True
+
 class UserBase(BaseModel):
     email: EmailStr
 
@@ -32,6 +87,18 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class Principal(BaseModel):
+    """
+    Authenticated user as seen by protected endpoints (no relationships,
+    so it can be cached)
+    """
+    id: int
+    email: str
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from redis_app import RedisService
+import cache_codec
+
+TASK_CACHE_TTL_SECONDS = int(os.getenv("TASK_CACHE_TTL_SECONDS", "300"))
+# How long a rebuild lock is held at most, and how long others wait for it
+TASK_CACHE_LOCK_TTL_MS = int(os.getenv("TASK_CACHE_LOCK_TTL_MS", "5000"))
+TASK_CACHE_LOCK_WAIT_SECONDS = float(os.getenv("TASK_CACHE_LOCK_WAIT_SECONDS", "2"))
+TASK_CACHE_POLL_SECONDS = 0.02
+
+# Striped in-process locks: bounded memory, a collision only means two
+# keys rebuild one after the other
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+def _local_lock(key: str) -> threading.Lock:
+    return _local_locks[hash(key) % len(_local_locks)]
+
+
+def _version_seed() -> int:
+    return int(time.time() * 1000)
+
+
+class TaskCache:
+    """
+    Per-user task caches with versioned keys.
+
+    Every cached view of a user's tasks (full list, pages, ...) embeds the
+    user's version number in its key. Writes bump the version instead of
+    deleting keys, so a write is one INCR no matter how many views exist;
+    stale entries are never read again and simply expire.
+
+    Rebuilds are single-flight: one thread per process and one process per
+    key (through a Redis lock) hits the database while the others wait for
+    the fresh entry.
+    """
+
+    @staticmethod
+    def version_key(user_id: int) -> str:
+        return f"user_tasks_version:{user_id}"
+
+    @staticmethod
+    def version(user_id: int) -> int:
+        return TaskCache.current_version(user_id) or 0
+
+    @staticmethod
+    def current_version(user_id: int) -> Optional[int]:
+        """
+        The user's version, or None on Redis errors. A missing counter
+        (never written, or evicted) starts from the clock in milliseconds,
+        so a version is never handed out twice and ETags built from it
+        (http_caching.task_etag) can't match different data.
+        """
+        return RedisService.get_counter(TaskCache.version_key(user_id), initial=_version_seed())
+
+    @staticmethod
+    def key(user_id: int, suffix: str = "", version: Optional[int] = None) -> str:
+        """
+        Versioned cache key for a view of the user's tasks
+        :param suffix: Identifies the view, e.g. "page:<hash>"
+        :param version: Version already read by the caller (e.g. for its ETag)
+        """
+        if version is None:
+            version = TaskCache.version(user_id)
+        key = f"user_tasks:{user_id}:v{version}"
+        return f"{key}:{suffix}" if suffix else key
+
+    @staticmethod
+    def invalidate(user_id: int) -> Optional[int]:
+        """
+        Invalidate every cached view of the user's tasks
+        :return: The new version, or None on Redis errors
+        """
+        return RedisService.incr(TaskCache.version_key(user_id), initial=_version_seed())
+
+    @staticmethod
+    def get_or_load(key: str, loader: Callable[[], any], ttl: int = TASK_CACHE_TTL_SECONDS) -> any:
+        """
+        Return the cached value of `key`, rebuilding it with `loader` on a miss.
+        Empty results ([] / {}) are cached like any other value.
+        :param loader: Returns a JSON-serializable value (never None)
+        """
+        def build():
+            value = loader()
+            RedisService.set_key(key, value, expire_seconds=ttl)
+            return value
+
+        return TaskCache._single_flight(key, lambda: RedisService.get_key(key), build)
+
+    @staticmethod
+    def get_or_load_raw(key: str, loader: Callable[[], any], ttl: int = TASK_CACHE_TTL_SECONDS) -> bytes:
+        """
+        Like get_or_load, but returns the value as JSON bytes that can be
+        sent as a response body without deserializing the cached copy
+        """
+        def build():
+            data = cache_codec.dumps_json(loader())
+            RedisService.set_raw_json(key, data, expire_seconds=ttl)
+            return data
+
+        return TaskCache._single_flight(key, lambda: RedisService.get_raw_json(key), build)
+
+    @staticmethod
+    def _single_flight(key: str, read: Callable[[], Optional[any]], build: Callable[[], any]) -> any:
+        """
+        Return read() if cached, else build() it in at most one thread per
+        process and one process per key
+        """
+        value = read()
+        if value is not None:
+            return value
+
+        with _local_lock(key):
+            # Another thread may have rebuilt it while we waited
+            value = read()
+            if value is not None:
+                return value
+
+            lock_key = f"lock:{key}"
+            token = RedisService.acquire_lock(lock_key, TASK_CACHE_LOCK_TTL_MS)
+            if token is None:
+                value = TaskCache._wait_for(read)
+                if value is not None:
+                    return value
+            try:
+                return build()
+            finally:
+                if token is not None:
+                    RedisService.release_lock(lock_key, token)
+
+    @staticmethod
+    def _wait_for(read: Callable[[], Optional[any]]) -> Optional[any]:
+        """
+        Poll for a value another process is rebuilding
+        """
+        deadline = time.monotonic() + TASK_CACHE_LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(TASK_CACHE_POLL_SECONDS)
+            value = read()
+            if value is not None:
+                return value
+        return None
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import os
+import weakref
+from typing import Dict, Optional, Set
+
+import redis_app
+from redis_app import RedisService
+
+logger = logging.getLogger(__name__)
+
+# Events buffered per WebSocket; a client that falls further behind gets a
+# "resync" event (refetch the list) instead of the backlog
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "100"))
+# Seconds between reconnect attempts after the pub/sub connection failed
+TASK_EVENTS_RETRY_SECONDS = 1.0
+
+RESYNC_EVENT = json.dumps({"type": "resync"})
+
+
+def task_events_channel(user_id: int) -> str:
+    return f"task_events:{user_id}"
+
+
+def publish_task_event(user_id: int, event: dict, version: Optional[int] = None) -> None:
+    """
+    Publish a change of the user's tasks to every worker's subscribers:
+
+        {"type": "created", "tasks": [task, ...]}
+        {"type": "updated", "ids": [...], "changes": {field: value}}
+        {"type": "deleted", "ids": [...]}
+
+    :param version: TaskCache version after the change
+    """
+    RedisService.publish(task_events_channel(user_id), {**event, "version": version})
+
+
+class TaskEventHub:
+    """
+    Fans task events out to the WebSockets of one worker process.
+
+    All sockets share one Redis pub/sub connection: the hub subscribes to
+    task_events:{user_id} while at least one of the user's sockets is
+    open, and a single reader task copies each message to the sockets'
+    queues. Events published by any worker reach every worker's sockets.
+    """
+
+    def __init__(self):
+        self._queues: Dict[int, Set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue:
+        """
+        :return: Queue receiving the user's events as JSON text
+        """
+        queue = asyncio.Queue(maxsize=TASK_EVENTS_QUEUE_SIZE)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = redis_app.make_pubsub_client().pubsub(ignore_subscribe_messages=True)
+            if user_id not in self._queues:
+                await self._pubsub.subscribe(task_events_channel(user_id))
+                self._queues[user_id] = set()
+            self._queues[user_id].add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        async with self._lock:
+            queues = self._queues.get(user_id)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._queues[user_id]
+                try:
+                    await self._pubsub.unsubscribe(task_events_channel(user_id))
+                except Exception as e:
+                    logger.warning("Task events unsubscribe failed: %r", e)
+
+    async def _read(self) -> None:
+        while self._queues:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read;
+                # events published meanwhile are lost, so clients refetch
+                logger.warning("Task events connection failed: %r", e)
+                for queues in list(self._queues.values()):
+                    for queue in queues:
+                        self._offer(queue, RESYNC_EVENT)
+                await asyncio.sleep(TASK_EVENTS_RETRY_SECONDS)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"]
+            user_id = int((channel.decode() if isinstance(channel, bytes) else channel).rsplit(":", 1)[1])
+            data = message["data"]
+            text = data.decode() if isinstance(data, bytes) else data
+            for queue in list(self._queues.get(user_id, ())):
+                self._offer(queue, text)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, text: str) -> None:
+        try:
+            queue.put_nowait(text)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog, the client refetches
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC_EVENT)
+
+
+# One hub per event loop (the pub/sub connection belongs to its loop)
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_task_event_hub() -> TaskEventHub:
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = TaskEventHub()
+    return hub
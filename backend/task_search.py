@@ -0,0 +1,230 @@
+import logging
+import os
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, column, func, literal_column, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger(__name__)
+
+# Search results are cached per user version (see TaskCache) for this long
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "30"))
+# Postgres text search configuration of tasks.search_vector; changing it
+# requires dropping the column so it is regenerated
+TEXT_SEARCH_CONFIG = "english"
+# Words of a query used on SQLite (FTS5 / LIKE)
+MAX_SEARCH_TERMS = 16
+_TERM_PATTERN = re.compile(r"\w+")
+
+BACKEND_TSVECTOR = "tsvector"
+BACKEND_FTS5 = "fts5"
+BACKEND_LIKE = "like"
+
+# Serializes concurrent startups (several workers) creating the index
+_POSTGRES_LOCK = "SELECT pg_advisory_xact_lock(hashtext('tasks_search_vector'))"
+# Catalog lookups: unlike the DDL (ACCESS EXCLUSIVE even when nothing is
+# added), they don't block or wait for queries on tasks
+_POSTGRES_INDEX_PARTS = [
+    """
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = 'tasks' AND column_name = 'search_vector'
+    """,
+    """
+    SELECT 1 FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = 'tasks' AND indexname = 'ix_tasks_search_vector'
+    """
+]
+
+_POSTGRES_DDL = [
+    # Generated column: Postgres keeps it current on every insert/update
+    f"""
+    ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)"
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts
+    USING fts5(title, description, content='tasks', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """
+]
+
+# Backend chosen by ensure_search_index, per database URL
+_backends = {}
+
+
+def ensure_search_index(engine: Engine) -> str:
+    """
+    Create the full-text index of tasks if it doesn't exist (idempotent,
+    run at startup after create_all; once the index exists only the
+    catalog is read):
+
+        Postgres  generated tsvector column tasks.search_vector + GIN index
+        SQLite    external-content FTS5 table tasks_fts kept current by
+                  triggers (rebuilt when the triggers were missing)
+
+    Other databases, or SQLite without FTS5, fall back to a LIKE scan.
+    :return: The search backend in use
+    """
+    backend = BACKEND_LIKE
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            indexed = _postgres_indexed(connection)
+        if not indexed:
+            with engine.begin() as connection:
+                connection.execute(text(_POSTGRES_LOCK))
+                # Another worker may have created it while we waited
+                if not _postgres_indexed(connection):
+                    logger.info("Creating the full-text index of tasks")
+                    for statement in _POSTGRES_DDL:
+                        connection.execute(text(statement))
+        backend = BACKEND_TSVECTOR
+    elif engine.dialect.name == "sqlite":
+        try:
+            with engine.begin() as connection:
+                indexed = connection.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'tasks_fts_ai'")
+                ).first() is not None
+                for statement in _SQLITE_DDL:
+                    connection.execute(text(statement))
+                if not indexed:
+                    # New index, or tasks was recreated without its triggers
+                    connection.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+            backend = BACKEND_FTS5
+        except OperationalError as e:
+            logger.warning("SQLite FTS5 is unavailable, task search uses LIKE: %s", e)
+    _backends[str(engine.url)] = backend
+    return backend
+
+
+def _postgres_indexed(connection) -> bool:
+    return all(connection.execute(text(query)).first() is not None for query in _POSTGRES_INDEX_PARTS)
+
+
+def search_backend(engine: Engine) -> str:
+    return _backends.get(str(engine.url), BACKEND_LIKE)
+
+
+def search_terms(query: str) -> List[str]:
+    return _TERM_PATTERN.findall(query.lower())[:MAX_SEARCH_TERMS]
+
+
+def search_user_tasks(
+    db: Session,
+    user_id: int,
+    query: str,
+    limit: int,
+    offset: int = 0,
+    backend: Optional[str] = None
+) -> Tuple[List[Tuple[models.Task, float]], bool]:
+    """
+    Tasks of a user matching `query` in title or description, best first
+    (title matches rank above description matches, then newest first)
+    :param query: Postgres: web search syntax ("quoted phrase", or, -word);
+                  SQLite: every word must match
+    :param backend: Defaults to the one chosen by ensure_search_index
+    :return: ([(task, rank)], whether more results follow)
+    """
+    backend = backend or search_backend(db.get_bind())
+    task = models.Task
+
+    if backend == BACKEND_TSVECTOR:
+        vector = literal_column("tasks.search_vector")
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        rank = func.ts_rank_cd(vector, tsquery)
+        match = vector.op("@@")(tsquery)
+        stmt = select(task, rank.label("rank")).where(task.user_id == user_id, match)
+    else:
+        terms = search_terms(query)
+        if not terms:
+            return [], False
+        if backend == BACKEND_FTS5:
+            fts = table("tasks_fts", column("rowid"))
+            # Quoted words: user input can't inject FTS5 query syntax
+            fts_query = " ".join(f'"{term}"' for term in terms)
+            # bm25 is lower for better matches; title weighs twice the description
+            rank = -func.bm25(literal_column("tasks_fts"), 2.0, 1.0)
+            stmt = (
+                select(task, rank.label("rank"))
+                .join(fts, fts.c.rowid == task.id)
+                .where(task.user_id == user_id, literal_column("tasks_fts").op("MATCH")(fts_query))
+            )
+        else:
+            # Number of words found in the title
+            rank = sum(case((task.title.icontains(term, autoescape=True), 1.0), else_=0.0) for term in terms)
+            stmt = select(task, rank.label("rank")).where(task.user_id == user_id)
+            for term in terms:
+                stmt = stmt.where(
+                    task.title.icontains(term, autoescape=True) | task.description.icontains(term, autoescape=True)
+                )
+
+    rows = db.execute(
+        stmt.order_by(rank.desc(), task.created_at.desc(), task.id.desc()).limit(limit + 1).offset(offset)
+    ).all()
+    return [(row[0], float(row[1])) for row in rows[:limit]], len(rows) > limit
+
+
+def find_pending_tasks_with_words(
+    db: Session,
+    user_id: int,
+    words: List[str],
+    limit: int,
+    backend: Optional[str] = None
+) -> list:
+    """
+    Pending tasks of a user whose title or description contains any of
+    `words`, oldest first, through the full-text index (same columns as
+    crud.get_pending_tasks). Without an index (LIKE backend) nothing is
+    returned: finding rare words would scan every task of the user.
+    :param words: Plain words (e.g. PriorityRanker keywords), not user input
+    """
+    backend = backend or search_backend(db.get_bind())
+    task = models.Task
+    terms = [term for word in words for term in search_terms(word)]
+    if not terms or backend == BACKEND_LIKE:
+        return []
+
+    stmt = select(task.id, task.title, task.description, task.completed, task.created_at).where(
+        task.user_id == user_id, task.completed.is_not(True)
+    )
+    if backend == BACKEND_TSVECTOR:
+        tsquery = func.to_tsquery(TEXT_SEARCH_CONFIG, " | ".join(terms))
+        stmt = stmt.where(literal_column("tasks.search_vector").op("@@")(tsquery))
+    else:
+        # Matched once as a subquery: joined, SQLite probes the FTS table
+        # for every task of the user while walking them in created_at order
+        fts = table("tasks_fts", column("rowid"))
+        stmt = stmt.where(task.id.in_(
+            select(fts.c.rowid).where(
+                literal_column("tasks_fts").op("MATCH")(" OR ".join(f'"{term}"' for term in terms))
+            )
+        ))
+    return db.execute(stmt.order_by(task.created_at, task.id).limit(limit)).all()
@@ -0,0 +1,132 @@
+import os
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from redis_app import RedisService
+from task_cache import TaskCache
+
+# Stats are rebuilt from the database when missing; the TTL bounds how long
+# drift (e.g. from a failed Redis write) can last without reconciliation
+TASK_STATS_TTL_SECONDS = int(os.getenv("TASK_STATS_TTL_SECONDS", str(7 * 24 * 3600)))
+DAY_FIELD_PREFIX = "day:"
+
+
+class TaskStats:
+    """
+    Per-user task counters kept in the Redis hash task_stats:{user_id}:
+
+        total          number of tasks
+        completed      number of completed tasks
+        day:YYYY-MM-DD tasks created that day (UTC)
+
+    Task writes apply deltas atomically after their commit (see
+    tasks_committed), so reads are
+    one HGETALL regardless of how many tasks the user has. A missing hash
+    is rebuilt from the database (see rebuild); tasks.reconcile_task_stats
+    corrects drift.
+
+    Stats are plain dicts: {"total": int, "completed": int, "days": {day: int}}
+    """
+
+    @staticmethod
+    def key(user_id) -> str:
+        return f"task_stats:{user_id}"
+
+    @staticmethod
+    def deltas(tasks: Iterable[Tuple[Optional[bool], datetime]], sign: int = 1) -> Dict[str, int]:
+        """
+        Counter changes for tasks being created (sign=1) or deleted (sign=-1)
+        :param tasks: (completed, created_at) of each task
+        """
+        deltas = {"total": 0, "completed": 0}
+        for completed, created_at in tasks:
+            deltas["total"] += sign
+            if completed:
+                deltas["completed"] += sign
+            day = DAY_FIELD_PREFIX + created_at.date().isoformat()
+            deltas[day] = deltas.get(day, 0) + sign
+        return deltas
+
+    @staticmethod
+    def apply(user_id: int, deltas: Dict[str, int]) -> None:
+        """
+        Apply counter changes; no-op when the user's stats aren't cached
+        """
+        RedisService.hincrby_if_exists(TaskStats.key(user_id), deltas)
+
+    @staticmethod
+    def tasks_committed(user_id: int, deltas: Dict[str, int]) -> Optional[int]:
+        """
+        Call right after a task write commits: bump the user's TaskCache
+        version (invalidating every cached view of their tasks), then apply
+        the write's counter changes. In this order a rebuild that counted
+        the rows before the commit either sees the version move and drops
+        its hash, or stored the hash before the deltas are applied to it.
+        :return: The new version, or None on Redis errors
+        """
+        version = TaskCache.invalidate(user_id)
+        TaskStats.apply(user_id, deltas)
+        return version
+
+    @staticmethod
+    def get(user_id: int) -> Optional[dict]:
+        fields = RedisService.get_hash(TaskStats.key(user_id))
+        if fields is None:
+            return None
+        days = {
+            field[len(DAY_FIELD_PREFIX):]: int(value)
+            for field, value in fields.items()
+            if field.startswith(DAY_FIELD_PREFIX) and int(value)
+        }
+        return {"total": int(fields.get("total", 0)), "completed": int(fields.get("completed", 0)), "days": days}
+
+    @staticmethod
+    def store(user_id: int, stats: dict) -> None:
+        mapping = {"total": stats["total"], "completed": stats["completed"]}
+        mapping.update({DAY_FIELD_PREFIX + day: count for day, count in stats["days"].items()})
+        RedisService.set_hash(TaskStats.key(user_id), mapping, expire_seconds=TASK_STATS_TTL_SECONDS)
+
+    @staticmethod
+    def get_or_load(user_id: int, loader: Callable[[], dict], version: Optional[int] = None) -> dict:
+        """
+        Cached stats, or loader() (e.g. crud.count_user_task_stats) stored
+        for the next reads
+        :param version: See rebuild
+        """
+        stats = TaskStats.get(user_id)
+        if stats is None:
+            stats = TaskStats.rebuild(user_id, loader, version=version)
+        return stats
+
+    @staticmethod
+    def rebuild(user_id: int, loader: Callable[[], dict], version: Optional[int] = None) -> dict:
+        """
+        Store loader() as the user's stats.
+
+        A task write committing while loader() runs may be missing from its
+        counts, and the write's delta was either skipped (no hash yet) or
+        applied to the hash being replaced. Every write bumps the user's
+        TaskCache version before applying its delta (tasks_committed), so
+        if the version moved during the rebuild the stored hash is dropped
+        and the next read rebuilds it again.
+        :param version: TaskCache.current_version read before loader() started, if the caller has it
+        :return: loader()'s stats
+        """
+        if version is None:
+            version = TaskCache.current_version(user_id)
+        stats = loader()
+        TaskStats.store(user_id, stats)
+        if version is None or TaskCache.current_version(user_id) != version:
+            RedisService.delete_key(TaskStats.key(user_id))
+        return stats
+
+    @staticmethod
+    def recent_days(stats: dict, days: int, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Tasks created per day over the last `days` days, oldest first
+        """
+        today = today or datetime.utcnow().date()
+        return {
+            day: stats["days"].get(day, 0)
+            for day in ((today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1))
+        }
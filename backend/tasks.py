@@ -1,5 +1,184 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List
+
 from celery_app import celery
+from database import SessionLocal
+from crud import (
+    count_user_task_stats,
+    get_notes_by_ids,
+    get_uncategorized_notes,
+    get_user_tasks,
+    set_note_categories
+)
+from note_queue import NOTE_BATCH_WINDOW_SECONDS, NOTE_MAX_ATTEMPTS, NoteQueue
+from redis_app import RedisService, close_async_client
+from task_stats import TaskStats
+from assistant.note_categorizer import NOTE_BATCH_SIZE, NoteCategorizer, note_content_hash
+from assistant.task_analyzer import TaskAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes to the result backend
+PROGRESS_UPDATE_INTERVAL = 0.5
+# Batches handled by one drain before it hands over to a fresh one
+NOTE_DRAIN_MAX_BATCHES = int(os.getenv("NOTE_DRAIN_MAX_BATCHES", "20"))
+# Uncategorized notes older than this are queued again by the sweep
+NOTE_REQUEUE_AFTER_SECONDS = int(os.getenv("NOTE_REQUEUE_AFTER_SECONDS", "300"))
+NOTE_REQUEUE_LIMIT = 1000
 
 @celery.task
 def sample_task(x: int, y: int) -> int:
-    return x + y 
\ No newline at end of file
+    return x + y
+
+@celery.task(bind=True)
+def analyze_user_tasks(self, user_id: int) -> dict:
+    """
+    Run the batch analysis for all tasks of a user, reporting progress
+    as PROGRESS state meta {"done": n, "total": m}
+    """
+    db = SessionLocal()
+    try:
+        tasks = get_user_tasks(db=db, user_id=user_id)
+        total = len(tasks)
+        self.update_state(state="PROGRESS", meta={"done": 0, "total": total})
+
+        last_update = 0.0
+
+        def on_progress(done: int, total: int):
+            nonlocal last_update
+            now = time.monotonic()
+            if done == total or now - last_update >= PROGRESS_UPDATE_INTERVAL:
+                last_update = now
+                self.update_state(state="PROGRESS", meta={"done": done, "total": total})
+
+        return asyncio.run(_analyze_tasks(tasks, on_progress))
+    finally:
+        db.close()
+
+async def _analyze_tasks(tasks: List, on_progress) -> dict:
+    analyzer = TaskAnalyzer()
+    try:
+        return await analyzer.abatch_analyze_tasks(tasks, on_progress=on_progress)
+    finally:
+        # Both are bound to this task's event loop, which ends here
+        await analyzer.async_client.close()
+        await close_async_client()
+
+@celery.task
+def reconcile_task_stats() -> int:
+    """
+    Recompute every cached TaskStats hash from the database to correct
+    drift (lost Redis writes, writes racing a rebuild). Runs on the beat
+    schedule; stats that aren't cached are rebuilt on their next read.
+    :return: Number of users reconciled
+    """
+    db = SessionLocal()
+    try:
+        reconciled = 0
+        for key in RedisService.scan_keys(TaskStats.key("*")):
+            user_id = int(key.rsplit(":", 1)[1])
+            TaskStats.rebuild(user_id, lambda: count_user_task_stats(db, user_id))
+            reconciled += 1
+        return reconciled
+    finally:
+        db.close()
+
+def schedule_note_categorization(countdown: float = NOTE_BATCH_WINDOW_SECONDS) -> bool:
+    """
+    Schedule a categorize_notes drain unless one is already pending
+    :return: True if a drain was scheduled
+    """
+    token = NoteQueue.claim_drain()
+    if token is None:
+        return False
+    try:
+        categorize_notes.apply_async(args=[token], countdown=countdown)
+        return True
+    except Exception as e:
+        NoteQueue.release_drain(token)
+        logger.warning("Could not schedule note categorization: %r", e)
+        return False
+
+def enqueue_note_categorization(note_ids: List[int]) -> None:
+    """
+    Queue notes for AI categorization. Only touches Redis and the broker,
+    never the model; notes that fail to queue are picked up by
+    requeue_uncategorized_notes.
+    """
+    if NoteQueue.push(note_ids):
+        schedule_note_categorization()
+
+@celery.task(ignore_result=True)
+def categorize_notes(token: str) -> int:
+    """
+    Drain the note queue in micro-batches of NOTE_BATCH_SIZE: one model
+    call per batch (NoteCategorizer) and one bulk UPDATE for the results
+    :param token: Drain lock taken by schedule_note_categorization
+    :return: Number of notes categorized
+    """
+    db = SessionLocal()
+    try:
+        # One event loop for the whole drain: the model and Redis clients
+        # are bound to the loop they were first used on
+        return asyncio.run(_drain_note_queue(db))
+    finally:
+        db.close()
+        NoteQueue.release_drain(token)
+        # Notes queued after the last pop, or more than one drain's worth
+        if NoteQueue.length():
+            schedule_note_categorization(countdown=0)
+
+async def _drain_note_queue(db) -> int:
+    categorized = 0
+    categorizer = NoteCategorizer()
+    try:
+        for _ in range(NOTE_DRAIN_MAX_BATCHES):
+            note_ids = NoteQueue.pop(NOTE_BATCH_SIZE)
+            if not note_ids:
+                break
+            notes = get_notes_by_ids(db, note_ids)
+            if notes:
+                results = await categorizer.categorize(notes)
+                categorized += set_note_categories(db, notes, results)
+                _record_failures(categorizer, [note for note in notes if note.id not in results])
+        return categorized
+    finally:
+        await categorizer.aclose()
+        await close_async_client()
+
+def _record_failures(categorizer: NoteCategorizer, notes: List) -> None:
+    failures = NoteQueue.record_failures([categorizer.content_hash(note) for note in notes])
+    for note, count in zip(notes, failures):
+        if count == NOTE_MAX_ATTEMPTS:
+            logger.warning("Note %d was not categorized after %d attempts, it is no longer queued", note.id, count)
+
+@celery.task
+def requeue_uncategorized_notes() -> int:
+    """
+    Queue notes that are still uncategorized NOTE_REQUEUE_AFTER_SECONDS
+    after creation (lost enqueues, failed model calls), except those whose
+    content failed NOTE_MAX_ATTEMPTS times. Runs on the beat schedule.
+    :return: Number of notes queued
+    """
+    db = SessionLocal()
+    note_ids = []
+    try:
+        created_before = datetime.utcnow() - timedelta(seconds=NOTE_REQUEUE_AFTER_SECONDS)
+        after_id = 0
+        # Paged so notes given up on don't crowd out the others
+        while len(note_ids) < NOTE_REQUEUE_LIMIT:
+            notes = get_uncategorized_notes(db, created_before, NOTE_REQUEUE_LIMIT, after_id)
+            if not notes:
+                break
+            given_up = NoteQueue.given_up([note_content_hash(note) for note in notes])
+            note_ids.extend(note.id for note, skip in zip(notes, given_up) if not skip)
+            after_id = notes[-1].id
+    finally:
+        db.close()
+    note_ids = note_ids[:NOTE_REQUEUE_LIMIT]
+    enqueue_note_categorization(note_ids)
+    return len(note_ids)
@@ -21,7 +21,6 @@ import {
   TimelineContent,
   TimelineDot,
 } from "@mui/lab";
-import axios from "axios";
 
 interface TaskAnalyticsProps {
   token: string;
@@ -43,34 +42,88 @@ interface TaskAnalysis {
     title: string;
     reason: string;
   }>;
-  individual_analyses: Array<{
-    task_id: number;
-    analysis: string;
-    success: boolean;
-  }>;
 }
 
+interface IndividualAnalysis {
+  task_id: number;
+  analysis: string;
+  success: boolean;
+}
+
+type AnalysisEvent =
+  | ({ type: "analysis" } & IndividualAnalysis)
+  | ({ type: "summary" } & TaskAnalysis);
+
 const TaskAnalytics: React.FC<TaskAnalyticsProps> = ({ token }) => {
   const [analysis, setAnalysis] = useState<TaskAnalysis | null>(null);
+  const [individualAnalyses, setIndividualAnalyses] = useState<
+    IndividualAnalysis[]
+  >([]);
   const [loading, setLoading] = useState(true);
+  const [streaming, setStreaming] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
   const fetchAnalysis = useCallback(async () => {
+    const handleEvent = (event: AnalysisEvent) => {
+      if (event.type === "analysis") {
+        if (event.success) {
+          const item: IndividualAnalysis = {
+            task_id: event.task_id,
+            analysis: event.analysis,
+            success: event.success,
+          };
+          setIndividualAnalyses((previous) => [...previous, item]);
+        }
+      } else {
+        setAnalysis({
+          summary: event.summary,
+          priority_tasks: event.priority_tasks,
+        });
+      }
+      // The first event replaces the spinner; the rest render as they arrive
+      setLoading(false);
+    };
+
     try {
       setLoading(true);
-      const response = await axios.get(
-        process.env.REACT_APP_API_URL + "/api/tasks/analyze",
+      setStreaming(true);
+      setAnalysis(null);
+      setIndividualAnalyses([]);
+      // Results arrive as NDJSON, one analysis per line, summary last
+      const response = await fetch(
+        process.env.REACT_APP_API_URL + "/api/tasks/analyze/stream",
         {
           headers: { Authorization: `Bearer ${token}` },
         }
       );
-      setAnalysis(response.data);
+      if (!response.ok || !response.body) {
+        throw new Error(`Unexpected response: ${response.status}`);
+      }
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+        for (const line of lines) {
+          if (line.trim()) {
+            handleEvent(JSON.parse(line));
+          }
+        }
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer));
+      }
       setError(null);
     } catch (err) {
       setError("Failed to fetch task analysis");
       console.error("Error fetching analysis:", err);
     } finally {
       setLoading(false);
+      setStreaming(false);
     }
   }, [token]);
 
@@ -95,7 +148,7 @@ const TaskAnalytics: React.FC<TaskAnalyticsProps> = ({ token }) => {
     return <Alert severity="error">{error}</Alert>;
   }
 
-  if (!analysis) {
+  if (!analysis && !streaming && individualAnalyses.length === 0) {
     return <Alert severity="info">No analysis available</Alert>;
   }
 
@@ -105,96 +158,109 @@ const TaskAnalytics: React.FC<TaskAnalyticsProps> = ({ token }) => {
         Task Analysis Dashboard
       </Typography>
 
-      {/* Task Distribution Card */}
-      <div className="grid gap-3 grid-cols-1 md:grid-cols-2">
-        <div>
-          <Card>
+      {streaming && (
+        <Box sx={{ display: "flex", alignItems: "center", gap: 2, mb: 2 }}>
+          <CircularProgress size={20} />
+          <Typography variant="body2" color="text.secondary">
+            Analyzing tasks... {individualAnalyses.length} done
+          </Typography>
+        </Box>
+      )}
+
+      {analysis && (
+        <>
+          {/* Task Distribution Card */}
+          <div className="grid gap-3 grid-cols-1 md:grid-cols-2">
+            <div>
+              <Card>
+                <CardContent>
+                  <Typography variant="h6" gutterBottom>
+                    Task Distribution
+                  </Typography>
+                  <Box sx={{ display: "flex", gap: 2, mb: 2 }}>
+                    <Chip
+                      label={`Total: ${analysis.summary.task_distribution.total_tasks}`}
+                      color="primary"
+                    />
+                    <Chip
+                      label={`Completed: ${analysis.summary.task_distribution.completed_tasks}`}
+                      color="success"
+                    />
+                    <Chip
+                      label={`Pending: ${analysis.summary.task_distribution.pending_tasks}`}
+                      color="warning"
+                    />
+                  </Box>
+                  <Typography variant="body1">
+                    Completion Rate:{" "}
+                    {analysis.summary.task_distribution.completion_rate.toFixed(1)}%
+                  </Typography>
+                </CardContent>
+              </Card>
+            </div>
+
+            {/* Workload Status Card */}
+            <div>
+              <Card>
+                <CardContent>
+                  <Typography variant="h6" gutterBottom>
+                    Workload Status
+                  </Typography>
+                  <Typography variant="body1" color="text.secondary">
+                    {analysis.summary.workload_status}
+                  </Typography>
+                </CardContent>
+              </Card>
+            </div>
+          </div>
+
+          {/* Priority Tasks */}
+          <Card sx={{ mt: 3 }}>
             <CardContent>
               <Typography variant="h6" gutterBottom>
-                Task Distribution
-              </Typography>
-              <Box sx={{ display: "flex", gap: 2, mb: 2 }}>
-                <Chip
-                  label={`Total: ${analysis.summary.task_distribution.total_tasks}`}
-                  color="primary"
-                />
-                <Chip
-                  label={`Completed: ${analysis.summary.task_distribution.completed_tasks}`}
-                  color="success"
-                />
-                <Chip
-                  label={`Pending: ${analysis.summary.task_distribution.pending_tasks}`}
-                  color="warning"
-                />
-              </Box>
-              <Typography variant="body1">
-                Completion Rate:{" "}
-                {analysis.summary.task_distribution.completion_rate.toFixed(1)}%
+                Priority Tasks
               </Typography>
+              <Timeline>
+                {analysis.priority_tasks.map((task) => (
+                  <TimelineItem key={task.id}>
+                    <TimelineSeparator>
+                      <TimelineDot color="primary" />
+                      <TimelineConnector />
+                    </TimelineSeparator>
+                    <TimelineContent>
+                      <Typography variant="subtitle1">{task.title}</Typography>
+                      <Typography variant="body2" color="text.secondary">
+                        {task.reason}
+                      </Typography>
+                    </TimelineContent>
+                  </TimelineItem>
+                ))}
+              </Timeline>
             </CardContent>
           </Card>
-        </div>
 
-        {/* Workload Status Card */}
-        <div>
-          <Card>
+          {/* Optimization Tips */}
+          <Card sx={{ mt: 3 }}>
             <CardContent>
               <Typography variant="h6" gutterBottom>
-                Workload Status
-              </Typography>
-              <Typography variant="body1" color="text.secondary">
-                {analysis.summary.workload_status}
+                Optimization Tips
               </Typography>
+              <List>
+                {analysis.summary.optimization_tips.map((tip, index) => (
+                  <React.Fragment key={index}>
+                    <ListItem>
+                      <ListItemText primary={tip} />
+                    </ListItem>
+                    {index < analysis.summary.optimization_tips.length - 1 && (
+                      <Divider />
+                    )}
+                  </React.Fragment>
+                ))}
+              </List>
             </CardContent>
           </Card>
-        </div>
-      </div>
-
-      {/* Priority Tasks */}
-      <Card sx={{ mt: 3 }}>
-        <CardContent>
-          <Typography variant="h6" gutterBottom>
-            Priority Tasks
-          </Typography>
-          <Timeline>
-            {analysis.priority_tasks.map((task) => (
-              <TimelineItem key={task.id}>
-                <TimelineSeparator>
-                  <TimelineDot color="primary" />
-                  <TimelineConnector />
-                </TimelineSeparator>
-                <TimelineContent>
-                  <Typography variant="subtitle1">{task.title}</Typography>
-                  <Typography variant="body2" color="text.secondary">
-                    {task.reason}
-                  </Typography>
-                </TimelineContent>
-              </TimelineItem>
-            ))}
-          </Timeline>
-        </CardContent>
-      </Card>
-
-      {/* Optimization Tips */}
-      <Card sx={{ mt: 3 }}>
-        <CardContent>
-          <Typography variant="h6" gutterBottom>
-            Optimization Tips
-          </Typography>
-          <List>
-            {analysis.summary.optimization_tips.map((tip, index) => (
-              <React.Fragment key={index}>
-                <ListItem>
-                  <ListItemText primary={tip} />
-                </ListItem>
-                {index < analysis.summary.optimization_tips.length - 1 && (
-                  <Divider />
-                )}
-              </React.Fragment>
-            ))}
-          </List>
-        </CardContent>
-      </Card>
+        </>
+      )}
 
       {/* Individual Task Analyses */}
       <Card sx={{ mt: 3 }}>
@@ -203,7 +269,7 @@ const TaskAnalytics: React.FC<TaskAnalyticsProps> = ({ token }) => {
             Detailed Task Analysis
           </Typography>
           <List>
-            {analysis.individual_analyses.map((item, index) => (
+            {individualAnalyses.map((item, index) => (
               <React.Fragment key={item.task_id}>
                 <ListItem>
                   <ListItemText
@@ -211,7 +277,7 @@ const TaskAnalytics: React.FC<TaskAnalyticsProps> = ({ token }) => {
                     secondary={item.analysis}
                   />
                 </ListItem>
-                {index < analysis.individual_analyses.length - 1 && <Divider />}
+                {index < individualAnalyses.length - 1 && <Divider />}
               </React.Fragment>
             ))}
           </List>
@@ -219,7 +285,12 @@ const TaskAnalytics: React.FC<TaskAnalyticsProps> = ({ token }) => {
       </Card>
 
       <Box sx={{ mt: 3, display: "flex", justifyContent: "center" }}>
-        <Button variant="contained" color="primary" onClick={fetchAnalysis}>
+        <Button
+          variant="contained"
+          color="primary"
+          onClick={fetchAnalysis}
+          disabled={streaming}
+        >
           Refresh Analysis
         </Button>
       </Box>
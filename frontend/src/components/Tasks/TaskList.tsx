@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 import {
   List,
   ListItem,
@@ -29,6 +29,41 @@ interface TaskListProps {
   token: string;
 }
 
+// Messages of the /api/tasks/events change feed
+type TaskEvent =
+  | { type: "ready" | "resync"; version?: number }
+  | { type: "created"; tasks: Task[]; version?: number }
+  | { type: "updated"; ids: number[]; changes: Partial<Task>; version?: number }
+  | { type: "deleted"; ids: number[]; version?: number };
+
+// Deltas are idempotent: the same change may arrive both from our own
+// request and from the feed
+const applyTaskEvent = (tasks: Task[], event: TaskEvent): Task[] => {
+  switch (event.type) {
+    case "created": {
+      const created = new Map(event.tasks.map((task) => [task.id, task]));
+      return [
+        ...tasks.filter((task) => !created.has(task.id)),
+        ...event.tasks,
+      ];
+    }
+    case "updated": {
+      const ids = new Set(event.ids);
+      return tasks.map((task) =>
+        ids.has(task.id) ? { ...task, ...event.changes } : task
+      );
+    }
+    case "deleted": {
+      const ids = new Set(event.ids);
+      return tasks.filter((task) => !ids.has(task.id));
+    }
+    default:
+      return tasks;
+  }
+};
+
+const MAX_RECONNECT_DELAY_MS = 30000;
+
 interface TabPanelProps {
   children?: React.ReactNode;
   index: number;
@@ -71,14 +106,62 @@ const TaskList: React.FC<TaskListProps> = ({ token }) => {
     }
   }, [token]);
 
+  const fetchTasksRef = useRef(fetchTasks);
+  fetchTasksRef.current = fetchTasks;
+
   useEffect(() => {
     fetchTasks();
   }, [token, fetchTasks]);
 
+  // Live updates from other tabs and devices; the full list is only
+  // refetched when the feed (re)connects or asks for a resync
+  useEffect(() => {
+    let socket: WebSocket | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+    let attempts = 0;
+    let closed = false;
+
+    const connect = () => {
+      const url = (process.env.REACT_APP_API_URL || "").replace(/^http/, "ws");
+      const ws = new WebSocket(`${url}/api/tasks/events`);
+      socket = ws;
+      // Sent as a message rather than in the URL, which servers and
+      // proxies log
+      ws.onopen = () => {
+        ws.send(JSON.stringify({ type: "auth", token }));
+      };
+      ws.onmessage = (message) => {
+        const event: TaskEvent = JSON.parse(message.data);
+        if (event.type === "ready" || event.type === "resync") {
+          attempts = 0;
+          fetchTasksRef.current();
+        } else {
+          setTasks((current) => applyTaskEvent(current, event));
+        }
+      };
+      ws.onclose = (event) => {
+        // 1008: invalid or expired token, reconnecting won't help
+        if (closed || event.code === 1008) {
+          return;
+        }
+        const delay = Math.min(1000 * 2 ** attempts, MAX_RECONNECT_DELAY_MS);
+        attempts += 1;
+        reconnectTimer = setTimeout(connect, delay);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      socket?.close();
+    };
+  }, [token]);
+
   const handleAddTask = async (e: React.FormEvent) => {
     e.preventDefault();
     try {
-      await axios.post(
+      const response = await axios.post(
         process.env.REACT_APP_API_URL + "/api/tasks",
         {
           title: newTaskTitle,
@@ -90,7 +173,9 @@ const TaskList: React.FC<TaskListProps> = ({ token }) => {
       );
       setNewTaskTitle("");
       setNewTaskDescription("");
-      fetchTasks();
+      setTasks((current) =>
+        applyTaskEvent(current, { type: "created", tasks: [response.data] })
+      );
     } catch (error) {
       console.error("Error adding task:", error);
     }
@@ -105,7 +190,13 @@ const TaskList: React.FC<TaskListProps> = ({ token }) => {
           headers: { Authorization: `Bearer ${token}` },
         }
       );
-      fetchTasks();
+      setTasks((current) =>
+        applyTaskEvent(current, {
+          type: "updated",
+          ids: [taskId],
+          changes: { completed: !completed },
+        })
+      );
     } catch (error) {
       console.error("Error updating task:", error);
     }
@@ -119,7 +210,9 @@ const TaskList: React.FC<TaskListProps> = ({ token }) => {
           headers: { Authorization: `Bearer ${token}` },
         }
       );
-      fetchTasks();
+      setTasks((current) =>
+        applyTaskEvent(current, { type: "deleted", ids: [taskId] })
+      );
     } catch (error) {
       console.error("Error deleting task:", error);
     }